@@ -3,24 +3,78 @@ import streamlit as st
 import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from datetime import datetime, timedelta, time
-from nifty_themes import THEMES
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from datetime import datetime, time
+from nifty_themes import THEMES, THEME_FILES
 import os
+import tempfile
 import json
-import subprocess
-from rrg_helper import RRGCalculator
-from fetch_breadth_data import get_index_tickers
+import html
+try:
+    import orjson as fast_json # 3-10x faster parsing of the status/performance JSONs
+except ImportError:
+    import json as fast_json # json.loads accepts bytes too
+from concurrent.futures import ThreadPoolExecutor
 import urllib.parse
 
 # ---------------------------------------------------------
 # AUTO-UPDATE LOGIC
 # ---------------------------------------------------------
+UPDATE_SENTINEL = "last_update.txt" # Written by fetch_breadth_data.update_all()
+
+@st.fragment(run_every=10)
+def watch_background_update():
+    """Polls the running update and triggers a full rerun once it has finished."""
+    future = st.session_state.get('update_future')
+    if future is None:
+        return
+    if future.done():
+        st.rerun()
+    st.caption("⏳ Fetching latest market data in the background. Showing the last available data meanwhile.")
+
+def finish_background_update():
+    future = st.session_state.pop('update_future')
+    st.session_state['data_updated'] = True # Prevent infinite retry loop
+    try:
+        ok = future.result()
+        error = "no data fetched"
+    except Exception as e:
+        ok = False
+        error = e
+    
+    if ok:
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        st.success("Data updated! Reloading...")
+        st.rerun()
+    else:
+        # If the update fails (e.g. Memory Limit on Cloud), Log it but allow App to load old data
+        st.error(f"Auto-update skipped (Resource Limit). Using available data. Details: {error}")
+
 def check_and_update_data():
-    # Only run if not already updated in this session
-    if 'data_updated' in st.session_state:
+    # An update started earlier in this session runs in the background while old data is shown
+    if 'update_future' in st.session_state:
+        if st.session_state['update_future'].done():
+            finish_background_update()
+        else:
+            watch_background_update()
         return
 
+    # Only run once per session (any widget click reruns the script)
+    if st.session_state.get('update_checked') or 'data_updated' in st.session_state:
+        return
+    st.session_state['update_checked'] = True
+
+    # Cheap gate: the updater stamps the day it last succeeded, so no CSV parse is needed
+    try:
+        with open(UPDATE_SENTINEL) as f:
+            if f.read().strip() == datetime.now().date().isoformat():
+                return
+    except OSError:
+        pass
+
     req_file = "market_breadth_nifty50.csv"
     if not os.path.exists(req_file):
         return
@@ -59,17 +113,11 @@ def check_and_update_data():
             # mod_time = datetime.fromtimestamp(os.path.getmtime(req_file))
             # if (datetime.now() - mod_time).seconds < 300: return # Cooldown
             
-            try:
-                with st.spinner("Fetching latest market data..."):
-                    subprocess.run(["python3", "fetch_breadth_data.py"], check=True)
-                st.session_state['data_updated'] = True
-                st.cache_data.clear()
-                st.success("Data updated! Reloading...")
-                st.rerun()
-            except Exception as e:
-                # If script fails (e.g. Memory Limit on Cloud), Log it but allow App to load old data
-                st.error(f"Auto-update skipped (Resource Limit). Using available data. Details: {e}")
-                st.session_state['data_updated'] = True # Prevent infinite retry loop
+            # Run the updater in-process on a background thread (no new interpreter, no blocked UI);
+            # sessions arriving while it runs join the same update instead of starting another
+            import fetch_breadth_data # Deferred: pulls in yfinance, only needed when updating
+            st.session_state['update_future'] = fetch_breadth_data.submit_background_update()
+            watch_background_update()
                 
     except Exception as e:
         print(f"Update check error: {e}")
@@ -90,6 +138,7 @@ st.set_page_config(
 # Force Clear Cache on Deployment (Fix Missing Budget Data)
 if 'cache_cleared_v_budget_fix' not in st.session_state:
     st.cache_data.clear()
+    st.cache_resource.clear()
     st.session_state['cache_cleared_v_budget_fix'] = True
 
 st.sidebar.caption("App Version: Feb 20 - Performance Metrics & CAGR")
@@ -100,7 +149,7 @@ check_and_update_data()
 # ---------------------------------------------------------
 # CUSTOM STYLING (Dark Theme Optimization)
 # ---------------------------------------------------------
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     /* Global Background */
     .stApp {
@@ -136,7 +185,10 @@ st.markdown("""
         overflow: hidden;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+# st.html injects the raw <style> block without going through the markdown pipeline.
+# It must still be emitted every run: Streamlit drops elements a rerun does not re-emit.
+st.html(CUSTOM_CSS)
 
 # ---------------------------------------------------------
 # DATA LOADING
@@ -145,31 +197,290 @@ st.markdown("""
 # DATA LOADING
 # ---------------------------------------------------------
 # REMOVING CACHE FOR DEBUGGING
-@st.cache_data(ttl=3600)
-def load_data_v2(file_path):
+# The heatmap and RRG only ever read these two columns
+PRICE_COLUMNS = ['Date', 'Index_Close']
+# float32 closes halve the memory of every price-only frame (7 significant digits is plenty for index levels)
+PRICE_DTYPES = {'Index_Close': 'float32'}
+
+def ensure_parquet(file_path):
+    """Return the Parquet twin of a breadth CSV, (re)building it when the CSV is newer.
+
+    Falls back to the CSV path if the twin can't be written (e.g. read-only disk).
+    """
+    parquet_path = os.path.splitext(file_path)[0] + ".parquet"
+    if not os.path.exists(file_path):
+        # The updater may ship only the Parquet file
+        return parquet_path if os.path.exists(parquet_path) else file_path
+    csv_mtime = os.path.getmtime(file_path)
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= csv_mtime:
+        return parquet_path
+    try:
+        table = pacsv.read_csv(file_path, convert_options=pacsv.ConvertOptions(column_types={'Date': pa.timestamp('ns')}))
+        # Write to a temp file unique to this writer, then rename, so a concurrent session never
+        # reads a half-written file and two sessions rebuilding the same twin never interleave
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(parquet_path) or ".", suffix=".parquet")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pq.write_table(table, f, compression='zstd')
+            # Stamp the twin with the CSV's mtime: it holds the same data, so cache keys built
+            # from the newer of the two (data_file_mtime) don't change just because it was derived
+            os.utime(tmp_path, (csv_mtime, csv_mtime))
+            os.replace(tmp_path, parquet_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return parquet_path
+    except OSError:
+        return file_path
+
+def read_breadth_data(file_path, columns=None, dtypes=None):
+    """Uncached reader behind load_data_v2 (safe to call from worker threads).
+
+    Reads the columnar Parquet twin of `file_path`; `columns` prunes everything else
+    and the 2015 cut-off is pushed down into the Parquet scan. `dtypes` maps columns
+    to narrower types, applied by Arrow while converting the CSV fallback.
+    """
+    dtypes = dtypes or {}
     try:
-        # Load the CSV
-        df = pd.read_csv(file_path)
-        df['Date'] = pd.to_datetime(df['Date'])
-        # Filter: Only show 2015 onwards
-        df = df[df['Date'] >= "2015-01-01"]
+        source = ensure_parquet(file_path)
+        if source.endswith(".parquet"):
+            # Filter: Only show 2015 onwards
+            df = pd.read_parquet(source, columns=columns, engine='pyarrow', filters=[('Date', '>=', pd.Timestamp("2015-01-01"))])
+            df = df.astype(dtypes)
+        else:
+            # Typed Date column: Arrow's ISO-8601 parser, no per-string pd.to_datetime pass
+            convert_options = pacsv.ConvertOptions(
+                include_columns=columns or [],
+                column_types={'Date': pa.timestamp('ns'), **{col: pa.from_numpy_dtype(np.dtype(t)) for col, t in dtypes.items()}}
+            )
+            table = pacsv.read_csv(source, read_options=pacsv.ReadOptions(use_threads=True), convert_options=convert_options)
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+            df = df[df['Date'] >= "2015-01-01"]
         sorted_df = df.sort_values('Date')
         
         return sorted_df
-    except FileNotFoundError:
+    except (FileNotFoundError, KeyError, ValueError):
+        # KeyError / ValueError (ArrowInvalid): a requested column is missing from this file
         return None
 
+# The loaders below use cache_resource: their DataFrames are read-only downstream, so a cache hit
+# hands back the stored object instead of pickling a copy of it on every rerun.
+# `file_mtime` (see data_file_mtime) only keys the cache, so a refresh on disk is picked up before the TTL.
+@st.cache_resource(ttl=3600)
+def load_data_v2(file_path, file_mtime):
+    """Date + Index_Close (float32) only."""
+    return read_breadth_data(file_path, columns=PRICE_COLUMNS, dtypes=PRICE_DTYPES)
+
+@st.cache_resource(ttl=3600)
+def load_data_full_v2(file_path, file_mtime):
+    """Every breadth column (Above/Below/Total/Percentage/Index_Close) for the single index view."""
+    return read_breadth_data(file_path)
+
+@st.cache_resource
+def get_rrg_calc(baseline_file, baseline_mtime):
+    """Shared RRGCalculator for the Nifty 50 baseline (rebuilt only when the file's mtime changes)."""
+    from rrg_helper import RRGCalculator
+    baseline_df = load_data_v2(baseline_file, baseline_mtime)
+    if baseline_df is None:
+        return None
+    return RRGCalculator(baseline_df)
+
+def data_file_mtime(file_path):
+    """Newer of the mtimes of a breadth CSV and its Parquet twin, or 0 if neither exists.
+
+    `--format parquet` updates only the twin, so keying on the CSV alone would miss the refresh.
+    """
+    stem = os.path.splitext(file_path)[0]
+    return max((os.path.getmtime(path) for path in (stem + ".csv", stem + ".parquet") if os.path.exists(path)), default=0)
+
+def data_file_keys(config_map, names):
+    """(name, file, mtime) for each of `names` whose CSV or Parquet twin exists, from a single os.scandir pass.
+
+    The mtime is the newer of the two files (as in data_file_mtime). Used as the cache key
+    for load_all_themes so a data refresh on disk invalidates it.
+    """
+    stem_mtimes = {}
+    for entry in os.scandir("."):
+        stem, ext = os.path.splitext(entry.name)
+        if ext in (".csv", ".parquet"):
+            stem_mtimes[stem] = max(stem_mtimes.get(stem, 0), entry.stat().st_mtime)
+    keys = []
+    for name in names:
+        file_path = config_map[name]['file']
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        if stem in stem_mtimes:
+            keys.append((name, file_path, stem_mtimes[stem]))
+    return tuple(keys)
+
+@st.cache_resource(ttl=3600)
+def load_all_themes(files_mtime_tuple):
+    """Load many breadth files at once. Takes a tuple of (name, file, mtime) so it stays hashable."""
+    names = [name for name, _file, _mtime in files_mtime_tuple]
+    paths = [file_path for _name, file_path, _mtime in files_mtime_tuple]
+    # Overlap the file reads in one parallel batch (pandas releases the GIL while parsing)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        dfs = executor.map(lambda p: read_breadth_data(p, columns=PRICE_COLUMNS, dtypes=PRICE_DTYPES), paths)
+        return {name: d for name, d in zip(names, dfs) if d is not None and not d.empty}
+
+@st.cache_data(ttl=3600)
+def compute_rrg(tf, tail, baseline_key, files_mtime_tuple):
+    """RRG metrics for every theme, memoized on (timeframe, tail, file mtimes).
+
+    Phase/theme filter clicks rerun the view with the same inputs and hit this cache.
+    Returns None when the Nifty 50 baseline can't be loaded.
+    """
+    calculator = get_rrg_calc(*baseline_key)
+    if calculator is None:
+        return None
+    
+    # Load ALL themes in one batch
+    full_data_dict = load_all_themes(files_mtime_tuple)
+    if not full_data_dict:
+        return pd.DataFrame()
+    return calculator.calculate_rrg_metrics(full_data_dict, timeframe=tf, tail_length=tail)
+
+@st.cache_data(ttl=3600)
+def build_rrg_traces(rrg_view):
+    """Plotly trace dicts for the RRG trails, heads and labels, memoized on the visible tail data.
+
+    Toggling phases/themes back to an earlier selection reuses the built traces.
+    """
+    import plotly.graph_objects as go
+    
+    traces = []
+    unique_tickers = rrg_view['Ticker'].unique()
+    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf', '#ffffff', '#00ff00', '#ffff00', '#0000ff', '#ff00ff']
+    color_of = {ticker: colors[i % len(colors)] for i, ticker in enumerate(unique_tickers)}
+
+    # Trails: one WebGL trace per palette colour, tickers separated by a NaN gap row,
+    # so the trace count is bounded by the palette however many themes are selected
+    by_ticker = rrg_view.groupby('Ticker', sort=False)
+    gaps = by_ticker.tail(1).assign(RS_Ratio=np.nan, RS_Momentum=np.nan)
+    trails = pd.concat([rrg_view, gaps]).sort_index(kind='stable')
+    trails['Color'] = trails['Ticker'].map(color_of)
+
+    for color, c_data in trails.groupby('Color', sort=False):
+        traces.append(go.Scattergl(
+            x=c_data['RS_Ratio'],
+            y=c_data['RS_Momentum'],
+            customdata=c_data[['Ticker', 'Date']],
+            mode='lines+markers',
+            marker=dict(size=4, symbol="circle", color=color, opacity=0.7),
+            line=dict(width=2, color=color),
+            connectgaps=False,
+            hovertemplate="<b>%{customdata[0]}</b><br>Date: %{customdata[1]|%d %b %Y}<br>Ratio: %{x:.2f}<br>Mom: %{y:.2f}<extra></extra>"
+        ))
+
+    # Heads: a triangle rotated along the last segment (a dot for single-point trails)
+    heads = by_ticker.tail(1).set_index('Ticker')
+    prevs = by_ticker.nth(-2).set_index('Ticker').reindex(heads.index)
+    head_colors = heads.index.map(color_of)
+    dx = heads['RS_Ratio'] - prevs['RS_Ratio']
+    dy = heads['RS_Momentum'] - prevs['RS_Momentum']
+    has_prev = prevs['RS_Ratio'].notna().to_numpy()
+    # Marker angles are clockwise from "up"; the axes share a scale, so data angles are screen angles
+    angles = np.where(has_prev, 90 - np.degrees(np.arctan2(dy, dx)), 0)
+
+    traces.append(go.Scattergl(
+        x=heads['RS_Ratio'],
+        y=heads['RS_Momentum'],
+        mode='markers',
+        marker=dict(
+            symbol=np.where(has_prev, "triangle-up", "circle"),
+            size=np.where(has_prev, 12, 8),
+            angle=angles,
+            color=head_colors,
+            opacity=0.9
+        ),
+        hoverinfo='skip'
+    ))
+
+    # Labels
+    traces.append(go.Scattergl(
+        x=heads['RS_Ratio'],
+        y=heads['RS_Momentum'],
+        mode='text',
+        text=heads.index,
+        textposition="top center",
+        textfont=dict(color=head_colors, size=12, weight="bold"),
+        hoverinfo='skip'
+    ))
+    
+    return [trace.to_plotly_json() for trace in traces]
+
+# Static parts of the RRG figure, shared by every rerun
+# Background Quadrants - Use very large coordinates to cover dynamic range
+RRG_BASE_SHAPES = [
+    dict(type="rect", x0=100, y0=100, x1=1000, y1=1000, fillcolor="rgba(34, 197, 94, 0.05)", line=dict(width=0), layer="below"),
+    dict(type="rect", x0=100, y0=-1000, x1=1000, y1=100, fillcolor="rgba(234, 179, 8, 0.05)", line=dict(width=0), layer="below"),
+    dict(type="rect", x0=-1000, y0=-1000, x1=100, y1=100, fillcolor="rgba(239, 68, 68, 0.05)", line=dict(width=0), layer="below"),
+    dict(type="rect", x0=-1000, y0=100, x1=100, y1=1000, fillcolor="rgba(59, 130, 246, 0.05)", line=dict(width=0), layer="below"),
+]
+
+# Watermarks (Refined: Smaller, greater transparency)
+RRG_BASE_ANNOTATIONS = [
+    # Top-Right (Leading)
+    dict(xref="paper", yref="paper", x=0.98, y=0.98, text="LEADING", showarrow=False, font=dict(color="rgba(34, 197, 94, 0.15)", size=30, weight="bold"), xanchor="right", yanchor="top"),
+    # Bottom-Right (Weakening)
+    dict(xref="paper", yref="paper", x=0.98, y=0.02, text="WEAKENING", showarrow=False, font=dict(color="rgba(234, 179, 8, 0.15)", size=30, weight="bold"), xanchor="right", yanchor="bottom"),
+    # Bottom-Left (Lagging)
+    dict(xref="paper", yref="paper", x=0.02, y=0.02, text="LAGGING", showarrow=False, font=dict(color="rgba(239, 68, 68, 0.15)", size=30, weight="bold"), xanchor="left", yanchor="bottom"),
+    # Top-Left (Improving)
+    dict(xref="paper", yref="paper", x=0.02, y=0.98, text="IMPROVING", showarrow=False, font=dict(color="rgba(59, 130, 246, 0.15)", size=30, weight="bold"), xanchor="left", yanchor="top"),
+]
+
+RRG_BASE_LAYOUT = dict(
+    shapes=RRG_BASE_SHAPES,
+    annotations=RRG_BASE_ANNOTATIONS,
+    xaxis=dict(title=dict(text="RS-Ratio (Trend)"), zeroline=True, zerolinecolor="gray", zerolinewidth=1),
+    yaxis=dict(title=dict(text="RS-Momentum (ROC)"), zeroline=True, zerolinecolor="gray", zerolinewidth=1, scaleanchor="x", scaleratio=1),
+    template="plotly_dark",
+    height=850,
+    showlegend=False
+)
+
+@st.cache_data(show_spinner=False)
+def build_breadth_figures(file_path, file_mtime):
+    """Breadth % and participation figures for one index as plain dicts, memoized per (file, mtime).
+
+    Reruns of the same view (tab switches, toggles) reuse them instead of rebuilding and re-validating the traces.
+    """
+    import plotly.graph_objects as go
+    
+    df = load_data_full_v2(file_path, file_mtime)
+    latest_date = df['Date'].iloc[-1]
+    
+    fig_pct = go.Figure()
+    # WebGL traces: thousands of daily points render on the GPU instead of as SVG paths
+    df_pct_plot = minmax_downsample(df, 'Percentage')
+    fig_pct.add_trace(go.Scattergl(x=df_pct_plot['Date'], y=df_pct_plot['Percentage'], mode='lines', name='% Above 200 SMA', line=dict(color='#3b82f6', width=2), hovertemplate='<b>%{x|%d %b %Y}</b><br>%{y:.2f}%<extra></extra>'))
+    fig_pct.add_hrect(y0=80, y1=100, fillcolor="green", opacity=0.1, layer="below", line_width=0)
+    fig_pct.add_hrect(y0=0, y1=20, fillcolor="red", opacity=0.1, layer="below", line_width=0)
+    fig_pct.add_hline(y=50, line_dash="dash", line_color="gray", annotation_text="Neutral (50%)")
+    title_text = f"Percentage of Stocks Above 200-Day SMA (Latest: {latest_date.strftime('%d %b %Y')})"
+    fig_pct.update_layout(title=title_text, yaxis_title="Percentage (%)", xaxis_title="Date", template="plotly_dark", height=500, yaxis=dict(range=[0, 100]), hovermode="x unified", xaxis=dict(hoverformat='%d %b %Y'))
+
+    fig_count = go.Figure()
+    # Scattergl has no stackgroup: stack by filling Above to zero and Above+Below to the previous trace
+    df_count_plot = minmax_downsample(df, 'Above')
+    fig_count.add_trace(go.Scattergl(x=df_count_plot['Date'], y=df_count_plot['Above'], mode='lines', name='Above', fill='tozeroy', line=dict(width=0), fillcolor='rgba(34, 197, 94, 0.6)'))
+    fig_count.add_trace(go.Scattergl(x=df_count_plot['Date'], y=df_count_plot['Above'] + df_count_plot['Below'], customdata=df_count_plot['Below'], mode='lines', name='Below', fill='tonexty', line=dict(width=0), fillcolor='rgba(239, 68, 68, 0.6)', hovertemplate='%{customdata}'))
+    fig_count.update_layout(title="Market Participation", yaxis_title="Stocks", xaxis_title="Date", template="plotly_dark", height=400, hovermode="x unified", xaxis=dict(hoverformat='%d %b %Y'))
+    
+    return fig_pct.to_dict(), fig_count.to_dict()
+
 @st.cache_data
 def get_cached_constituents(index_name):
     """Cached wrapper for fetching index tickers (avoids frequent network calls for Nifty lists)."""
+    from fetch_breadth_data import get_index_tickers # Deferred: importing the updater pulls in yfinance
     return get_index_tickers(index_name)
 
 @st.cache_data
 def load_market_status():
     """Load the latest pre-computed market status details."""
     try:
-        with open("market_status_latest.json", "r") as f:
-            return json.load(f)
+        with open("market_status_latest.json", "rb") as f:
+            return fast_json.loads(f.read())
     except FileNotFoundError:
         return {}
 
@@ -177,36 +488,133 @@ def load_market_status():
 def load_constituent_performance():
     """Load the latest pre-computed constituent performance metrics."""
     try:
-        with open("constituent_performance_latest.json", "r") as f:
-            return json.load(f)
+        with open("constituent_performance_latest.json", "rb") as f:
+            return fast_json.loads(f.read())
     except FileNotFoundError:
         return {}
 
+# Metrics shown in the Constituents table, in display order
+PERF_COLUMNS = ["1D", "1W", "1M", "3M", "6M", "1Y", "3Y", "5Y", "RS (20D)"]
+
+@st.cache_data
+def load_constituent_perf_frame():
+    """Constituent performance as one ticker-indexed float64 frame of PERF_COLUMNS (NaN where missing)."""
+    perf = load_constituent_performance()
+    return pd.DataFrame.from_dict(perf, orient='index').reindex(columns=PERF_COLUMNS).astype('float64')
+
+def make_tv_urls(tickers):
+    """TradingView chart URLs for a Series/list of Yahoo tickers (vectorized str ops, no per-ticker call)."""
+    tickers = pd.Series(tickers, dtype=object)
+    clean = tickers.str.replace(".NS", "", regex=False).str.replace(".BO", "", regex=False)
+    tv_symbol = clean.str.replace("-", "_", regex=False).str.replace("&", "_", regex=False)
+    exchange = np.where(tickers.str.contains(".BO", regex=False), "BSE", "NSE")
+    return "https://www.tradingview.com/chart/?symbol=" + exchange + ":" + tv_symbol
+
+@st.cache_data
+def open_all_button_html(urls):
+    """HTML for the "Open All in TradingView" button; the URLs ride in a data-urls attribute parsed on click."""
+    urls_attr = html.escape(json.dumps(list(urls)), quote=True)
+    return f"""
+    <div style="text-align: right; margin-bottom: 0px;">
+        <button data-urls="{urls_attr}" onclick="openAll(this)" style="background-color: #2563eb; color: white; border: none; padding: 0.5rem 1rem; border-radius: 4px; font-weight: bold; cursor: pointer; font-family: 'Inter', sans-serif; transition: background-color 0.2s;">
+            ↗️ Open All in TradingView
+        </button>
+    </div>
+    <script>
+    function openAll(button) {{
+        var urls = JSON.parse(button.dataset.urls);
+        var blocked = false;
+        urls.forEach(function(url) {{
+            var newWin = window.open(url, '_blank');
+            if (!newWin || newWin.closed || typeof newWin.closed == 'undefined') {{
+                blocked = true;
+            }}
+        }});
+        if (blocked) {{
+            alert("⚠️ Pop-up Blocker Detected!\\n\\nYour browser is preventing multiple tabs from opening at once.\\n\\nPlease click the Pop-up Blocker icon in your browser's address bar (typically on the right), select 'Always allow pop-ups and redirects from this site', and then try again.");
+        }}
+    }}
+    </script>
+    """
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_file_debug_info(file_path):
+    """(cwd, absolute path, modified time or None) for the debug expander, refreshed at most every 30 s."""
+    abs_path = os.path.abspath(file_path)
+    file_mtime = data_file_mtime(abs_path)
+    mtime = datetime.fromtimestamp(file_mtime) if file_mtime else None
+    return os.getcwd(), abs_path, mtime
+
+def minmax_downsample(df, column, target_points=1200, min_rows=1500):
+    """Rows of `df` keeping the min and max of `column` in each bucket (~target_points rows in total).
+
+    A chart a thousand-odd pixels wide can't show more than ~2 points per pixel column, so this
+    shrinks the plotted payload while keeping every visible spike. Short frames pass through.
+    """
+    n = len(df)
+    if n <= min_rows:
+        return df
+    bucket = -(-n // (target_points // 2))
+    values = df[column].reset_index(drop=True).dropna()
+    groups = values.index // bucket
+    extremes = [values.groupby(groups).idxmin().to_numpy(), values.groupby(groups).idxmax().to_numpy()]
+    # Always keep the endpoints so the chart still ends on the latest value
+    keep = np.unique(np.concatenate(extremes + [[0, n - 1]]).astype(np.intp))
+    return df.iloc[keep]
+
+def lookback_prices(df, days):
+    """Index_Close as of `days` calendar days before the latest row (NaN where history is too short).
+
+    `df` must be sorted by Date; a single searchsorted resolves every lookback at once.
+    """
+    dates = df['Date'].to_numpy(dtype='datetime64[ns]')
+    closes = df['Index_Close'].to_numpy(dtype=float)
+    targets = dates[-1] - np.asarray(days, dtype='timedelta64[D]')
+    idx = np.searchsorted(dates, targets, side='right') - 1
+    return np.where(idx >= 0, closes[np.maximum(idx, 0)], np.nan)
+
+# Long [Ticker, Date, Index_Close] table of every index/theme, written by fetch_breadth_data.py
+ALL_CLOSES_FILE = "all_closes.parquet"
+
+def load_closes_long(config_map):
+    """Every entry of `config_map` as one long frame sorted by (Ticker, Date).
+
+    Prefers the updater's pre-aggregated all_closes.parquet (a single columnar read). Falls back
+    to the per-file batch load when it is missing or older than any of the breadth files, and
+    for groups the updater's last run skipped (they keep their older file but aren't in the table).
+    """
+    file_keys = data_file_keys(config_map, config_map.keys())
+    newest_file = max((mtime for _name, _file, mtime in file_keys), default=0)
+    
+    pieces = []
+    missing_keys = file_keys
+    if os.path.exists(ALL_CLOSES_FILE) and os.path.getmtime(ALL_CLOSES_FILE) >= newest_file:
+        closes = pd.read_parquet(
+            ALL_CLOSES_FILE,
+            columns=['Ticker'] + PRICE_COLUMNS,
+            engine='pyarrow',
+            filters=[('Date', '>=', pd.Timestamp("2015-01-01")), ('Ticker', 'in', list(config_map))]
+        ).astype(PRICE_DTYPES)
+        pieces.append(closes)
+        found = set(closes['Ticker'].unique())
+        missing_keys = tuple(key for key in file_keys if key[0] not in found)
+    
+    if missing_keys:
+        all_data = load_all_themes(missing_keys)
+        pieces.extend(d[PRICE_COLUMNS].assign(Ticker=name) for name, d in all_data.items())
+    if not pieces:
+        return pd.DataFrame(columns=['Ticker'] + PRICE_COLUMNS)
+    closes = pd.concat(pieces, ignore_index=True)
+    
+    return closes.sort_values(['Ticker', 'Date'], kind='stable', ignore_index=True)
 
 @st.cache_data(ttl=3600)
 def get_performance_summary_v3(config_map):
-    """Load all CSVs and calculate performance metrics for a heatmap + RS."""
-    summary_data = []
-    
-    # Load Nifty 50 Baseline first
-    baseline_file = config_map.get("Nifty 50", {}).get('file')
-    baseline_df = None
-    
-    if baseline_file and os.path.exists(baseline_file):
-        baseline_df = load_data_v2(baseline_file)
-    
-    # Pre-calculate Baseline values for RS (20 Days)
-    nifty_latest_price = 0
-    nifty_20d_price = 0
-    
-    if baseline_df is not None and not baseline_df.empty and 'Index_Close' in baseline_df.columns:
-        latest = baseline_df.iloc[-1]
-        nifty_latest_price = latest['Index_Close']
-        target_date = latest['Date'] - timedelta(days=20)
-        mask = baseline_df['Date'] <= target_date
-        if mask.any():
-            nifty_20d_price = baseline_df[mask].iloc[-1]['Index_Close']
-            
+    """Calculate performance metrics for a heatmap + RS from the long closes table."""
+    closes = load_closes_long(config_map)
+    if closes.empty:
+        return pd.DataFrame()
+    
     periods = {
         "1 Day": 1,
         "1 Week": 7,
@@ -217,96 +625,98 @@ def get_performance_summary_v3(config_map):
         "3 Years": 365*3,
         "5 Years": 365*5
     }
+    lookback_days = list(periods.values()) + [20]
     
-    for name, config in config_map.items():
-        file_path = config['file']
-        if not os.path.exists(file_path):
-            continue
-            
-        try:
-            df = load_data_v2(file_path)
-            if df is None or df.empty or 'Index_Close' not in df.columns:
-                continue
-                
-            latest = df.iloc[-1]
-            current_price = latest['Index_Close']
-            current_date = latest['Date']
-            
-            row = {"Theme/Index": name}
-            
-            # Standard Periods
-            for p_name, days in periods.items():
-                target_date = current_date - timedelta(days=days)
-                mask = df['Date'] <= target_date
-                if mask.any():
-                    past_row = df[mask].iloc[-1]
-                    past_price = past_row['Index_Close']
-                    if past_price > 0:
-                        ret = ((current_price - past_price) / past_price) * 100
-                        row[p_name] = ret
-                    else:
-                        row[p_name] = None
-                else:
-                    row[p_name] = None
-            
-            # RS Calculation
-            rs_val = None
+    # Row ranges of each index/theme in the (Ticker, Date)-sorted table
+    tickers = closes['Ticker'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]])
+    lasts = np.r_[starts[1:], len(tickers)] - 1
+    names = tickers[starts]
+    
+    # Monotonic (ticker, date) key so one searchsorted resolves every as-of lookup of every theme;
+    # a target that falls before a theme's history lands in the previous theme's range
+    secs = closes['Date'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+    secs -= secs.min()
+    group = np.repeat(np.arange(len(starts)), lasts - starts + 1)
+    keys = group * (secs.max() + 1) + secs
+    targets = keys[lasts][:, None] - np.asarray(lookback_days, dtype=np.int64) * 86400
+    idx = np.searchsorted(keys, targets, side='right') - 1
+    
+    # float32 end to end: half the memory traffic of the gathers and the return math
+    prices = closes['Index_Close'].to_numpy(dtype=np.float32)
+    current_prices = prices[lasts]
+    past_prices = np.where(idx >= starts[:, None], prices[np.maximum(idx, 0)], np.float32(np.nan))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rets = np.where(past_prices > 0, ((current_prices[:, None] - past_prices) / past_prices) * np.float32(100), np.float32(np.nan))
+        
+        # RS (20D) vs the Nifty 50 baseline
+        rs_vals = np.full(len(names), np.nan, dtype=np.float32)
+        baseline = np.flatnonzero(names == "Nifty 50")
+        if baseline.size:
+            nifty_latest_price = current_prices[baseline[0]]
+            nifty_20d_price = past_prices[baseline[0], -1]
             if nifty_latest_price > 0 and nifty_20d_price > 0:
-                t_target = current_date - timedelta(days=20)
-                t_mask = df['Date'] <= t_target
-                if t_mask.any():
-                    t_past_price = df[t_mask].iloc[-1]['Index_Close']
-                    if t_past_price > 0:
-                        current_ratio = current_price / nifty_latest_price
-                        past_ratio = t_past_price / nifty_20d_price
-                        rs_val = ((current_ratio - past_ratio) / past_ratio) * 100
-            
-            row["RS (20D)"] = rs_val
-            
-            summary_data.append(row)
-        except Exception:
-            continue
-            
-    return pd.DataFrame(summary_data)
+                current_ratio = current_prices / nifty_latest_price
+                past_ratio = past_prices[:, -1] / nifty_20d_price
+                rs_vals = np.where(past_ratio > 0, ((current_ratio - past_ratio) / past_ratio) * np.float32(100), np.float32(np.nan))
+    
+    # Keep the config_map ordering
+    rank = {name: i for i, name in enumerate(config_map)}
+    order = np.argsort([rank[name] for name in names], kind='stable')
+    
+    summary = pd.DataFrame(rets[order, :-1], columns=list(periods))
+    summary.insert(0, "Theme/Index", names[order])
+    summary["RS (20D)"] = rs_vals[order]
+    return summary
 
 st.sidebar.title("Configuration")
 
 # Add manual refresh button to clear cache
 if st.sidebar.button("🔄 Refresh Data", help="Click if data seems stale"):
     st.cache_data.clear()
+    st.cache_resource.clear()
     st.success("Cache cleared! Reloading...")
     st.rerun()
 
 # Config Map
-index_config = {
-    "Nifty 50": {"file": "market_breadth_nifty50.csv", "title": "Nifty 50", "description": "Top 50 Blue-chip Companies"},
-    "Nifty 500": {"file": "market_breadth_nifty500.csv", "title": "Nifty 500", "description": "Top 500 Companies"},
-    "Nifty Smallcap 250": {"file": "market_breadth_smallcap.csv", "title": "Nifty Smallcap 250", "description": "Smallcap Segment"},
-    "NIFTY AUTO": {"file": "breadth_auto.csv", "title": "Nifty Auto", "description": "Automobile Sector"},
-    "NIFTY BANK": {"file": "breadth_bank.csv", "title": "Nifty Bank", "description": "Banking Sector"},
-    "NIFTY FINANCIAL SERVICES": {"file": "breadth_finance.csv", "title": "Nifty Financial Services", "description": "Financial Services (Banks, NBFCs, Insurance)"},
-    "NIFTY FMCG": {"file": "breadth_fmcg.csv", "title": "Nifty FMCG", "description": "Fast Moving Consumer Goods"},
-    "NIFTY HEALTHCARE": {"file": "breadth_healthcare.csv", "title": "Nifty Healthcare", "description": "Healthcare & Hospitals"},
-    "NIFTY IT": {"file": "breadth_it.csv", "title": "Nifty IT", "description": "Information Technology"},
-    "NIFTY MEDIA": {"file": "breadth_media.csv", "title": "Nifty Media", "description": "Media & Entertainment"},
-    "NIFTY METAL": {"file": "breadth_metal.csv", "title": "Nifty Metal", "description": "Metals & Mining"},
-    "NIFTY PHARMA": {"file": "breadth_pharma.csv", "title": "Nifty Pharma", "description": "Pharmaceuticals"},
-    "NIFTY PRIVATE BANK": {"file": "breadth_pvtbank.csv", "title": "Nifty Private Bank", "description": "Private Sector Banks"},
-    "NIFTY PSU BANK": {"file": "breadth_psubank.csv", "title": "Nifty PSU Bank", "description": "Public Sector Banks"},
-    "NIFTY REALTY": {"file": "breadth_realty.csv", "title": "Nifty Realty", "description": "Real Estate"},
-    "NIFTY CONSUMER DURABLES": {"file": "breadth_consumer.csv", "title": "Nifty Consumer Durables", "description": "Consumer Durables"},
-    "NIFTY OIL AND GAS": {"file": "breadth_oilgas.csv", "title": "Nifty Oil & Gas", "description": "Oil, Gas & Petroleum"},
-    "Solar Manufacturing": {"file": "breadth_theme_solar_manufacturing.csv", "title": "Solar Manufacturing", "description": "Solar Cells, Modules & EPC"}
-}
-
-for theme_name in THEMES:
-    safe_name = theme_name.lower().replace(" ", "_").replace("&", "and").replace("-", "_").replace("(", "").replace(")", "").replace("__", "_")
-    filename = f"breadth_theme_{safe_name}.csv"
-    index_config[theme_name] = {
-        "file": filename,
-        "title": theme_name,
-        "description": f"Custom Theme: {theme_name}"
+@st.cache_resource
+def build_index_config():
+    """Index/theme -> file/title/description map, built once per process instead of on every rerun.
+
+    Callers must treat it as read-only.
+    """
+    config = {
+        "Nifty 50": {"file": "market_breadth_nifty50.csv", "title": "Nifty 50", "description": "Top 50 Blue-chip Companies"},
+        "Nifty 500": {"file": "market_breadth_nifty500.csv", "title": "Nifty 500", "description": "Top 500 Companies"},
+        "Nifty Smallcap 250": {"file": "market_breadth_smallcap.csv", "title": "Nifty Smallcap 250", "description": "Smallcap Segment"},
+        "NIFTY AUTO": {"file": "breadth_auto.csv", "title": "Nifty Auto", "description": "Automobile Sector"},
+        "NIFTY BANK": {"file": "breadth_bank.csv", "title": "Nifty Bank", "description": "Banking Sector"},
+        "NIFTY FINANCIAL SERVICES": {"file": "breadth_finance.csv", "title": "Nifty Financial Services", "description": "Financial Services (Banks, NBFCs, Insurance)"},
+        "NIFTY FMCG": {"file": "breadth_fmcg.csv", "title": "Nifty FMCG", "description": "Fast Moving Consumer Goods"},
+        "NIFTY HEALTHCARE": {"file": "breadth_healthcare.csv", "title": "Nifty Healthcare", "description": "Healthcare & Hospitals"},
+        "NIFTY IT": {"file": "breadth_it.csv", "title": "Nifty IT", "description": "Information Technology"},
+        "NIFTY MEDIA": {"file": "breadth_media.csv", "title": "Nifty Media", "description": "Media & Entertainment"},
+        "NIFTY METAL": {"file": "breadth_metal.csv", "title": "Nifty Metal", "description": "Metals & Mining"},
+        "NIFTY PHARMA": {"file": "breadth_pharma.csv", "title": "Nifty Pharma", "description": "Pharmaceuticals"},
+        "NIFTY PRIVATE BANK": {"file": "breadth_pvtbank.csv", "title": "Nifty Private Bank", "description": "Private Sector Banks"},
+        "NIFTY PSU BANK": {"file": "breadth_psubank.csv", "title": "Nifty PSU Bank", "description": "Public Sector Banks"},
+        "NIFTY REALTY": {"file": "breadth_realty.csv", "title": "Nifty Realty", "description": "Real Estate"},
+        "NIFTY CONSUMER DURABLES": {"file": "breadth_consumer.csv", "title": "Nifty Consumer Durables", "description": "Consumer Durables"},
+        "NIFTY OIL AND GAS": {"file": "breadth_oilgas.csv", "title": "Nifty Oil & Gas", "description": "Oil, Gas & Petroleum"},
+        "Solar Manufacturing": {"file": "breadth_theme_solar_manufacturing.csv", "title": "Solar Manufacturing", "description": "Solar Cells, Modules & EPC"}
     }
+    
+    for theme_name, filename in THEME_FILES.items():
+        config[theme_name] = {
+            "file": filename,
+            "title": theme_name,
+            "description": f"Custom Theme: {theme_name}"
+        }
+    
+    return config
+
+index_config = build_index_config()
 
 # Initialize Session State Navigation variables
 if "nav_category" not in st.session_state:
@@ -351,10 +761,14 @@ category = st.sidebar.radio(
 )
 
 # ---------------------------------------------------------
-# VIEW LOGIC
+# RRG VIEW
 # ---------------------------------------------------------
-
-if category == "Sector Rotation (RRG)":
+# Rendered as a fragment so Timeframe / Tail / phase widget changes only
+# rerun this block instead of the whole script.
+@st.fragment
+def render_rrg():
+    import plotly.graph_objects as go  # Deferred: only the chart views pay plotly's import cost
+    
     st.title("Relative Rotation Graph (RRG)")
     st.markdown("*Cycle analysis of themes vs Nifty 50*")
     
@@ -376,45 +790,32 @@ if category == "Sector Rotation (RRG)":
     
     with st.spinner("Analyzing Market Breadth..."):
         baseline_file = index_config["Nifty 50"]["file"]
-        baseline_df = load_data_v2(baseline_file)
+        baseline_mtime = data_file_mtime(baseline_file)
+        rrg_result = None
+        if baseline_mtime:
+            rrg_result = compute_rrg(
+                tf_map[timeframe],
+                tail,
+                (baseline_file, baseline_mtime),
+                data_file_keys(index_config, rrg_keys)
+            )
         
-        if baseline_df is None:
+        if rrg_result is None:
             st.error("Nifty 50 data missing for baseline.")
         else:
-            calculator = RRGCalculator(baseline_df)
-            full_data_dict = {}
-            
-            # Load ALL themes
-            for name in rrg_keys:
-                config = index_config.get(name)
-                if config:
-                    fpath = config['file']
-                    if os.path.exists(fpath):
-                        d = load_data_v2(fpath)
-                        if d is not None and not d.empty:
-                            full_data_dict[name] = d
-            
-            if full_data_dict:
-                global_rrg_df = calculator.calculate_rrg_metrics(
-                    full_data_dict, 
-                    timeframe=tf_map[timeframe], 
-                    tail_length=tail
-                )
+            global_rrg_df = rrg_result
 
     # Calculate Quadrants immediately if data exists
     if not global_rrg_df.empty:
         last_points_global = global_rrg_df.sort_values('Date').groupby('Ticker').last()
         
-        def get_quadrant(row):
-            r = row['RS_Ratio']
-            m = row['RS_Momentum']
-            if r > 100 and m > 100: return "Leading"
-            if r > 100 and m < 100: return "Weakening"
-            if r < 100 and m < 100: return "Lagging"
-            if r < 100 and m > 100: return "Improving"
-            return "Unknown"
-            
-        last_points_global['Quadrant'] = last_points_global.apply(get_quadrant, axis=1)
+        r = last_points_global['RS_Ratio'].to_numpy()
+        m = last_points_global['RS_Momentum'].to_numpy()
+        last_points_global['Quadrant'] = np.select(
+            [(r > 100) & (m > 100), (r > 100) & (m < 100), (r < 100) & (m < 100), (r < 100) & (m > 100)],
+            ["Leading", "Weakening", "Lagging", "Improving"],
+            default="Unknown"
+        )
 
     # -------------------------------------------------------------------------
     # PHASE FILTERING (Multiselect)
@@ -425,79 +826,48 @@ if category == "Sector Rotation (RRG)":
     all_phases = ['Leading', 'Weakening', 'Lagging', 'Improving']
     if 'selected_phases' not in st.session_state:
         st.session_state['selected_phases'] = all_phases
-        
-    p_col1, p_col2, p_col3 = st.columns([1, 1, 4])
-    if p_col1.button("Select All", key="phase_all"):
-        st.session_state['selected_phases'] = all_phases
-        st.rerun()
-    if p_col2.button("Deselect All", key="phase_none"):
-        st.session_state['selected_phases'] = []
-        st.rerun()
-        
-    selected_phases = st.multiselect(
-        "Select Phases", 
-        all_phases, 
-        default=all_phases, 
-        key='selected_phases',
-        label_visibility="collapsed"
-    )
     
     # -------------------------------------------------------------------------
     # DYNAMIC THEME SELECTION
     # -------------------------------------------------------------------------
-    # Update theme selection based on phases IF phases changed? 
-    # Or just always filter the options available? 
     # User asked: "select themes to display should automatically change"
+    # When the PHASE selection changes, the theme selection is reset to the themes in those phases.
+    # If phases don't change, themes are left alone (allows manual select/deselect).
+    # This runs in widget callbacks, which Streamlit executes before the rerun, so the
+    # widgets below already see the new state and no extra st.rerun() is needed.
+    quadrant_map = last_points_global['Quadrant'].to_dict() if not last_points_global.empty else {}
     
-    # Logic:
-    # 1. subset tickers that match selected phases
-    # 2. update session_state['rrg_multiselect'] to match these tickers
+    def themes_for_phases(phases):
+        return [t for t, q in quadrant_map.items() if q in phases]
     
-    if not last_points_global.empty:
-        # Get valid tickers for current phases
-        valid_tickers_for_phases = last_points_global[last_points_global['Quadrant'].isin(selected_phases)].index.tolist()
-        
-        # Check if we need to update selection (only if phase selection changed logic is implied, 
-        # but to keep it simple and robust per request: "display only the themes in that phase")
-        # We will FORCE the selection to match the phases.
-        
-        # However, we need to allow manual deselection too? 
-        # User said: "It should display all themes when all the phases are selected"
-        # and "select themes... automatically change to display only themes in that phase"
-        
-        # Let's derive the selection from phases directly for now, as that seems to be the intent.
-        # But we still want the multiselect to show them so user can subtract specific ones.
-        
-        # To avoid infinite rerun loops, we compare with current state
-        # We use a set for comparison to ignore order
-        current_selection_set = set(st.session_state.get('rrg_multiselect', []))
-        target_selection_set = set(valid_tickers_for_phases)
-        
-        # IMPORTANT: We only auto-update if the SET of valid tickers is different from current selection.
-        # But wait, this prevents manual deselection of a single stock.
-        # Better approach:
-        # Use a "last_phase_hash" to detect if PHASE selection changed.
-        # If PHASES changed -> Reset themes to match new phases.
-        # If PHASES didn't change -> Leave themes alone (allows manual select/deselect).
+    def set_phases(phases):
+        st.session_state['selected_phases'] = phases
+        st.session_state['rrg_multiselect'] = themes_for_phases(phases)
+    
+    def sync_themes_to_phases():
+        st.session_state['rrg_multiselect'] = themes_for_phases(st.session_state['selected_phases'])
+    
+    if 'rrg_multiselect' not in st.session_state:
+        st.session_state['rrg_multiselect'] = themes_for_phases(st.session_state['selected_phases'])
         
-        current_phase_hash = hash(tuple(sorted(selected_phases)))
-        last_phase_hash = st.session_state.get('last_phase_hash', None)
+    p_col1, p_col2, p_col3 = st.columns([1, 1, 4])
+    p_col1.button("Select All", key="phase_all", on_click=set_phases, args=(all_phases,))
+    p_col2.button("Deselect All", key="phase_none", on_click=set_phases, args=([],))
         
-        if current_phase_hash != last_phase_hash:
-            st.session_state['rrg_multiselect'] = valid_tickers_for_phases
-            st.session_state['last_phase_hash'] = current_phase_hash
-            st.rerun()
+    st.multiselect(
+        "Select Phases", 
+        all_phases, 
+        key='selected_phases',
+        on_change=sync_themes_to_phases,
+        label_visibility="collapsed"
+    )
             
     # -------------------------------------------------------------------------
     # THEME WIDGET
     # -------------------------------------------------------------------------
     t_col1, t_col2, t_col3 = st.columns([1, 1, 4])
-    if t_col1.button("Select All Themes", type="secondary"):
-        st.session_state['rrg_multiselect'] = rrg_keys
-        st.rerun()
-    if t_col2.button("Deselect All Themes", type="secondary"):
-        st.session_state['rrg_multiselect'] = []
-        st.rerun()
+    t_col1.button("Select All Themes", type="secondary", on_click=lambda: st.session_state.update(rrg_multiselect=rrg_keys))
+    t_col2.button("Deselect All Themes", type="secondary", on_click=lambda: st.session_state.update(rrg_multiselect=[]))
         
     selected_rrg_themes = st.multiselect(
         "Select Themes to Display", 
@@ -527,106 +897,20 @@ if category == "Sector Rotation (RRG)":
             x_range = [min_x - pad, max_x + pad]
             y_range = [min_y - pad, max_y + pad]
             
-            fig = go.Figure()
-                    
-            # Background Quadrants - Use very large coordinates to cover dynamic range
-            rect_max = 1000 
-            rect_min = -1000
-            
-            fig.add_shape(type="rect", x0=100, y0=100, x1=rect_max, y1=rect_max, fillcolor="rgba(34, 197, 94, 0.05)", line_width=0, layer="below")
-            fig.add_shape(type="rect", x0=100, y0=rect_min, x1=rect_max, y1=100, fillcolor="rgba(234, 179, 8, 0.05)", line_width=0, layer="below")
-            fig.add_shape(type="rect", x0=rect_min, y0=rect_min, x1=100, y1=100, fillcolor="rgba(239, 68, 68, 0.05)", line_width=0, layer="below")
-            fig.add_shape(type="rect", x0=rect_min, y0=100, x1=100, y1=rect_max, fillcolor="rgba(59, 130, 246, 0.05)", line_width=0, layer="below")
-            
-            unique_tickers = rrg_view['Ticker'].unique()
-            colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf', '#ffffff', '#00ff00', '#ffff00', '#0000ff', '#ff00ff']
-            
-            for i, ticker in enumerate(unique_tickers):
-                t_data = rrg_view[rrg_view['Ticker'] == ticker]
-                color = colors[i % len(colors)]
-                
-                # Main Trail
-                fig.add_trace(go.Scatter(
-                    x=t_data['RS_Ratio'],
-                    y=t_data['RS_Momentum'],
-                    customdata=t_data['Date'],
-                    mode='lines+markers',
-                    name=ticker,
-                    marker=dict(size=4, symbol="circle", color=color, opacity=0.7),
-                    line=dict(width=2, color=color),
-                    hovertemplate=f"<b>{ticker}</b><br>Date: %{{customdata|%d %b %Y}}<br>Ratio: %{{x:.2f}}<br>Mom: %{{y:.2f}}<extra></extra>"
-                ))
-                
-                # Arrowhead (Annotation) & Label
-                if len(t_data) >= 2:
-                    head = t_data.iloc[-1]
-                    prev = t_data.iloc[-2]
-                    
-                    # Add Annotation Arrow
-                    # We use data coordinates for both head (x, y) and tail (ax, ay)
-                    fig.add_annotation(
-                        x=head['RS_Ratio'],
-                        y=head['RS_Momentum'],
-                        ax=prev['RS_Ratio'],
-                        ay=prev['RS_Momentum'],
-                        xref="x", yref="y",
-                        axref="x", ayref="y",
-                        showarrow=True,
-                        arrowhead=2, # Sharp arrow
-                        arrowsize=1.2,
-                        arrowwidth=2,
-                        arrowcolor=color,
-                        opacity=0.9
-                    )
-                    
-                    # Label (Annotation Text with Offset)
-                    fig.add_annotation(
-                        x=head['RS_Ratio'],
-                        y=head['RS_Momentum'],
-                        text=ticker,
-                        showarrow=False,
-                        xshift=0,
-                        yshift=15,
-                        xanchor="center",
-                        yanchor="bottom",
-                        font=dict(color=color, size=12, weight="bold"),
-                        bgcolor="rgba(0,0,0,0.5)", # Semi-transparent background for readability
-                        borderpad=2
-                    )
-                else:
-                    head = t_data.iloc[-1]
-                    fig.add_trace(go.Scatter(
-                        x=[head['RS_Ratio']],
-                        y=[head['RS_Momentum']],
-                        mode='markers+text',
-                        text=[ticker],
-                        textposition="top right",
-                        marker=dict(symbol="circle", size=8, color=color),
-                        textfont=dict(color=color, size=12, weight="bold"),
-                        showlegend=False
-                    ))
-
-            # Watermarks (Refined: Smaller, greater transparency)
-            # Top-Right (Leading)
-            fig.add_annotation(xref="paper", yref="paper", x=0.98, y=0.98, text="LEADING", showarrow=False, font=dict(color="rgba(34, 197, 94, 0.15)", size=30, weight="bold"), xanchor="right", yanchor="top")
-            # Bottom-Right (Weakening)
-            fig.add_annotation(xref="paper", yref="paper", x=0.98, y=0.02, text="WEAKENING", showarrow=False, font=dict(color="rgba(234, 179, 8, 0.15)", size=30, weight="bold"), xanchor="right", yanchor="bottom")
-            # Bottom-Left (Lagging)
-            fig.add_annotation(xref="paper", yref="paper", x=0.02, y=0.02, text="LAGGING", showarrow=False, font=dict(color="rgba(239, 68, 68, 0.15)", size=30, weight="bold"), xanchor="left", yanchor="bottom")
-            # Top-Left (Improving)
-            fig.add_annotation(xref="paper", yref="paper", x=0.02, y=0.98, text="IMPROVING", showarrow=False, font=dict(color="rgba(59, 130, 246, 0.15)", size=30, weight="bold"), xanchor="left", yanchor="top")
-
+            fig = go.Figure(data=build_rrg_traces(rrg_view), layout=RRG_BASE_LAYOUT)
             fig.update_layout(
                 title=f"Sector Rotation (vs Nifty 50) - {timeframe}",
-                xaxis_title="RS-Ratio (Trend)",
-                yaxis_title="RS-Momentum (ROC)",
-                xaxis=dict(range=x_range, zeroline=True, zerolinecolor="gray", zerolinewidth=1), 
-                yaxis=dict(range=y_range, zeroline=True, zerolinecolor="gray", zerolinewidth=1, scaleanchor="x", scaleratio=1),
-                template="plotly_dark",
-                height=850,
-                showlegend=False
+                xaxis_range=x_range,
+                yaxis_range=y_range
             )
             st.plotly_chart(fig, width="stretch")
+
+# ---------------------------------------------------------
+# VIEW LOGIC
+# ---------------------------------------------------------
+
+if category == "Sector Rotation (RRG)":
+    render_rrg()
 elif category == "Performance Overview":
     st.title("Market Performance Heatmap")
     st.markdown("*Comparative returns of all sectors and themes based on Equal-Weighted Index*")
@@ -640,29 +924,26 @@ elif category == "Performance Overview":
         if toggle_cagr:
             for col, yrs in [("1 Year", 1), ("3 Years", 3), ("5 Years", 5)]:
                 if col in perf_summary.columns:
-                    perf_summary[col] = perf_summary[col].apply(
-                        lambda x: (((1 + x/100)**(1/yrs)) - 1)*100 if pd.notna(x) else pd.NA
-                    )
+                    perf_summary[col] = (((1 + perf_summary[col].astype(float)/100)**(1/yrs)) - 1)*100
                     
         if "1 Year" in perf_summary.columns:
             perf_summary = perf_summary.sort_values("1 Year", ascending=False)
             
-        def color_return(val):
-            if pd.isna(val) or not isinstance(val, (int, float)): 
-                return ""
-            color = '#22c55e' if val >= 0 else '#ef4444' 
-            return f'color: {color}; font-weight: bold;'
-            
-        def safe_format(val):
-            if pd.isna(val) or not isinstance(val, (int, float)):
-                return str(val) if pd.notna(val) else ""
-            return f"{float(val):.2f}%"
+        def color_returns(block):
+            # One vectorized pass over the whole numeric block instead of a Python call per cell
+            vals = block.astype('Float64').to_numpy(dtype=float, na_value=np.nan)
+            css = np.where(vals >= 0, 'color: #22c55e; font-weight: bold;', 'color: #ef4444; font-weight: bold;')
+            css = np.where(np.isnan(vals), '', css)
+            return pd.DataFrame(css, index=block.index, columns=block.columns)
             
         numeric_cols = [c for c in perf_summary.columns if c != "Theme/Index"]
 
-        styler = perf_summary.style.map(color_return, subset=numeric_cols).format(safe_format, subset=numeric_cols)
+        # Number formatting is done by the browser from the raw floats; the Styler only carries colors
+        pct_column_config = {c: st.column_config.NumberColumn(format="%.2f%%") for c in numeric_cols}
+        styler = perf_summary.style.apply(color_returns, axis=None, subset=numeric_cols)
         st.dataframe(
             styler,
+            column_config=pct_column_config,
             height=2300,
             use_container_width=True,
             hide_index=True
@@ -684,16 +965,15 @@ else:
     st.title(f"{current_config['title']} Market Breadth")
     st.markdown(f"*{current_config['description']}*")
 
-    df = load_data_v2(current_config['file'])
+    df = load_data_full_v2(current_config['file'], data_file_mtime(current_config['file']))
 
     # --- DEBUG SECTION (TEMPORARY) ---
     with st.expander("🛠 System Debug Info (Check this if data seems old)", expanded=True):
-        st.write(f"**Current Working Directory:** `{os.getcwd()}`")
-        abs_path = os.path.abspath(current_config['file'])
+        cwd, abs_path, mtime = get_file_debug_info(current_config['file'])
+        st.write(f"**Current Working Directory:** `{cwd}`")
         st.write(f"**Loading File:** `{abs_path}`")
         
-        if os.path.exists(abs_path):
-            mtime = datetime.fromtimestamp(os.path.getmtime(abs_path))
+        if mtime is not None:
             st.write(f"**File Modified Time:** {mtime}")
         else:
             st.error("File NOT found on disk!")
@@ -706,67 +986,51 @@ else:
     # ---------------------------------
 
     if df is not None:
-        latest = df.iloc[-1]
-        prev = df.iloc[-2] if len(df) > 1 else latest
+        # Header metrics from a 2-row float slice (prev == latest when there is a single row)
+        tail_arr = df[['Total', 'Above', 'Below', 'Percentage']].to_numpy(dtype=float)[-2:]
+        prev_row, latest_row = tail_arr[0], tail_arr[-1]
+        latest_date = df['Date'].iloc[-1]
         
         col1, col2, col3, col4 = st.columns(4)
-        with col1: st.metric("Total Stocks", int(latest['Total']))
-        with col2: st.metric("Stocks > 200 SMA", int(latest['Above']), delta=int(latest['Above'] - prev['Above']))
-        with col3: st.metric("Stocks < 200 SMA", int(latest['Below']), delta=int(latest['Below'] - prev['Below']), delta_color="inverse")
-        with col4: st.metric("Breadth (%)", f"{latest['Percentage']:.2f}%", delta=f"{latest['Percentage'] - prev['Percentage']:.2f}%")
+        with col1: st.metric("Total Stocks", int(latest_row[0]))
+        with col2: st.metric("Stocks > 200 SMA", int(latest_row[1]), delta=int(latest_row[1] - prev_row[1]))
+        with col3: st.metric("Stocks < 200 SMA", int(latest_row[2]), delta=int(latest_row[2] - prev_row[2]), delta_color="inverse")
+        with col4: st.metric("Breadth (%)", f"{latest_row[3]:.2f}%", delta=f"{latest_row[3] - prev_row[3]:.2f}%")
 
         if 'Index_Close' in df.columns:
             st.subheader("Performance Trend (Equal Weighted)")
             toggle_cagr_idx = st.toggle("Annualize Returns (CAGR)", value=False, key="cagr_idx", help="Converts 1Y, 3Y, and 5Y returns to Compound Annual Growth Rate")
             periods = {"1 Day": 1, "1 Week": 7, "1 Month": 30, "3 Months": 90, "6 Months": 180, "1 Year": 365, "3 Years": 365*3, "5 Years": 365*5}
-            metrics = {}
-            current_price = latest['Index_Close']
-            for name, days in periods.items():
-                target_date = latest['Date'] - timedelta(days=days)
-                mask = df['Date'] <= target_date
-                if mask.any():
-                    past_row = df[mask].iloc[-1]
-                    if past_row['Index_Close'] > 0:
-                        ret = ((current_price - past_row['Index_Close']) / past_row['Index_Close']) * 100
-                        if toggle_cagr_idx and name in ["1 Year", "3 Years", "5 Years"]:
-                            yrs = 1 if name == "1 Year" else (3 if name == "3 Years" else 5)
-                            ret = (((1 + ret/100)**(1/yrs)) - 1) * 100
-                        metrics[name] = ret
-                    else: metrics[name] = None
-                else: metrics[name] = None
-            perf_df = pd.DataFrame([metrics])
-            def color_ret(val):
-                if pd.isna(val): return ""
-                return f'color: {"#22c55e" if val >= 0 else "#ef4444"}; font-weight: bold'
-            st.dataframe(perf_df.style.map(color_ret).format("{:.2f}%"), use_container_width=True, hide_index=True)
+            # All lookbacks in one searchsorted; NaN where history is too short
+            past_prices = lookback_prices(df, list(periods.values()))
+            current_price = df['Index_Close'].iloc[-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rets = np.where(past_prices > 0, ((current_price - past_prices) / past_prices) * 100, np.nan)
+                if toggle_cagr_idx:
+                    years = np.array([{"1 Year": 1, "3 Years": 3, "5 Years": 5}.get(name, 1) for name in periods])
+                    rets = (((1 + rets/100)**(1/years)) - 1) * 100
+            perf_df = pd.DataFrame([rets], columns=list(periods))
+            def color_ret(block):
+                # Whole-block CSS via NumPy masks instead of a Python call per cell
+                vals = block.to_numpy(dtype=float)
+                css = np.where(vals >= 0, 'color: #22c55e; font-weight: bold', 'color: #ef4444; font-weight: bold')
+                return pd.DataFrame(np.where(np.isnan(vals), '', css), index=block.index, columns=block.columns)
+            st.dataframe(perf_df.style.apply(color_ret, axis=None).format("{:.2f}%", na_rep=""), use_container_width=True, hide_index=True)
+
+        # Shared by both tabs (Streamlit runs every tab's body on each rerun)
+        market_status = load_market_status()
+        details = market_status.get(selected_index)
+        index_tickers = get_cached_constituents(selected_index)
 
         tab1, tab2 = st.tabs(["Breadth Chart", "Constituents"])
         with tab1:
-            fig_pct = go.Figure()
-            fig_pct.add_trace(go.Scatter(x=df['Date'], y=df['Percentage'], mode='lines', name='% Above 200 SMA', line=dict(color='#3b82f6', width=2), hovertemplate='<b>%{x|%d %b %Y}</b><br>%{y:.2f}%<extra></extra>'))
-            fig_pct.add_hrect(y0=80, y1=100, fillcolor="green", opacity=0.1, layer="below", line_width=0)
-            fig_pct.add_hrect(y0=0, y1=20, fillcolor="red", opacity=0.1, layer="below", line_width=0)
-            fig_pct.add_hline(y=50, line_dash="dash", line_color="gray", annotation_text="Neutral (50%)")
-            title_text = f"Percentage of Stocks Above 200-Day SMA (Latest: {latest['Date'].strftime('%d %b %Y')})"
-            fig_pct.update_layout(title=title_text, yaxis_title="Percentage (%)", xaxis_title="Date", template="plotly_dark", height=500, yaxis=dict(range=[0, 100]), hovermode="x unified", xaxis=dict(hoverformat='%d %b %Y'))
+            file_path = current_config['file']
+            file_mtime = data_file_mtime(file_path)
+            fig_pct, fig_count = build_breadth_figures(file_path, file_mtime)
             st.plotly_chart(fig_pct, width="stretch")
-
-            fig_count = go.Figure()
-            fig_count.add_trace(go.Scatter(x=df['Date'], y=df['Above'], mode='lines', name='Above', stackgroup='one', line=dict(width=0), fillcolor='rgba(34, 197, 94, 0.6)'))
-            fig_count.add_trace(go.Scatter(x=df['Date'], y=df['Below'], mode='lines', name='Below', stackgroup='one', line=dict(width=0), fillcolor='rgba(239, 68, 68, 0.6)'))
-            fig_count.update_layout(title="Market Participation", yaxis_title="Stocks", xaxis_title="Date", template="plotly_dark", height=400, hovermode="x unified", xaxis=dict(hoverformat='%d %b %Y'))
             st.plotly_chart(fig_count, width="stretch")
 
             # Restore original raw lists below the charts
-            market_status = load_market_status()
-            details = market_status.get(selected_index)
-            
-            def make_tv_url(ticker):
-                clean = ticker.replace(".NS", "").replace(".BO", "")
-                tv_symbol = clean.replace("-", "_").replace("&", "_")
-                exchange = "BSE" if ".BO" in ticker else "NSE"
-                return f"https://www.tradingview.com/chart/?symbol={exchange}:{tv_symbol}"
-
             tv_link_config = st.column_config.LinkColumn(
                 "Ticker", 
                 display_text=r"symbol=[A-Z]+:(.*)",
@@ -781,7 +1045,7 @@ else:
                     st.success(f"📈 Above 200 SMA ({len(details['above'])})")
                     if details['above']:
                         df_up = pd.DataFrame(details['above'], columns=["Ticker"])
-                        df_up["Ticker"] = df_up["Ticker"].apply(make_tv_url)
+                        df_up["Ticker"] = make_tv_urls(df_up["Ticker"])
                         st.dataframe(df_up, column_config={"Ticker": tv_link_config}, use_container_width=False, hide_index=True)
                     else:
                         st.caption("None")
@@ -790,7 +1054,7 @@ else:
                     st.error(f"📉 Below 200 SMA ({len(details['below'])})")
                     if details['below']:
                         df_down = pd.DataFrame(details['below'], columns=["Ticker"])
-                        df_down["Ticker"] = df_down["Ticker"].apply(make_tv_url)
+                        df_down["Ticker"] = make_tv_urls(df_down["Ticker"])
                         st.dataframe(df_down, column_config={"Ticker": tv_link_config}, use_container_width=False, hide_index=True)
                     else:
                         st.caption("None")
@@ -799,17 +1063,13 @@ else:
                 if new_stocks:
                     st.warning(f"🆕 New Stock — Insufficient History for 200 SMA ({len(new_stocks)})")
                     df_new = pd.DataFrame(new_stocks, columns=["Ticker"])
-                    df_new["Ticker"] = df_new["Ticker"].apply(make_tv_url)
+                    df_new["Ticker"] = make_tv_urls(df_new["Ticker"])
                     st.dataframe(df_new, column_config={"Ticker": tv_link_config}, use_container_width=False, hide_index=True)
 
         with tab2:
             st.subheader(f"Constituents of {current_config['title']}")
             
             # Use the functions defined in tab1 above
-            
-            market_status = load_market_status()
-            details = market_status.get(selected_index)
-            constituent_perf = load_constituent_performance()
 
             if details:
                 # Merge the market status categories
@@ -819,91 +1079,38 @@ else:
                 for t in details.get('new_stock', []): status_map[t] = "New Stock (<200d)"
 
                 # Fallback to offline constituents if NSE blocks the Streamlit Cloud IP
-                all_tickers = get_cached_constituents(selected_index)
+                all_tickers = index_tickers
                 if not all_tickers:
                     all_tickers = details.get('above', []) + details.get('below', []) + details.get('new_stock', [])
                 
                 if all_tickers and category == "Industries":
-                    tv_urls = [make_tv_url(t) for t in all_tickers]
-                    urls_js = json.dumps(tv_urls)
-                    html_code = f"""
-                    <div style="text-align: right; margin-bottom: 0px;">
-                        <button onclick="openAll()" style="background-color: #2563eb; color: white; border: none; padding: 0.5rem 1rem; border-radius: 4px; font-weight: bold; cursor: pointer; font-family: 'Inter', sans-serif; transition: background-color 0.2s;">
-                            ↗️ Open All in TradingView
-                        </button>
-                    </div>
-                    <script>
-                    function openAll() {{
-                        var urls = {urls_js};
-                        var blocked = false;
-                        urls.forEach(function(url) {{
-                            var newWin = window.open(url, '_blank');
-                            if (!newWin || newWin.closed || typeof newWin.closed == 'undefined') {{
-                                blocked = true;
-                            }}
-                        }});
-                        if (blocked) {{
-                            alert("⚠️ Pop-up Blocker Detected!\\n\\nYour browser is preventing multiple tabs from opening at once.\\n\\nPlease click the Pop-up Blocker icon in your browser's address bar (typically on the right), select 'Always allow pop-ups and redirects from this site', and then try again.");
-                        }}
-                    }}
-                    </script>
-                    """
-                    components.html(html_code, height=45)
+                    components.html(open_all_button_html(tuple(make_tv_urls(all_tickers))), height=45)
                 
                 # Setup Toggle
                 toggle_cagr = st.toggle("Annualize Returns (CAGR)", value=False, help="Converts 1Y, 3Y, and 5Y returns to Compound Annual Growth Rate")
                 
-                rows = []
-                for ticker in all_tickers:
-                    perf = constituent_perf.get(ticker, {})
-                    
-                    row = {
-                        "Ticker": make_tv_url(ticker),
-                        "1D": perf.get("1D") if perf.get("1D") is not None else pd.NA,
-                        "1W": perf.get("1W") if perf.get("1W") is not None else pd.NA,
-                        "1M": perf.get("1M") if perf.get("1M") is not None else pd.NA,
-                        "3M": perf.get("3M") if perf.get("3M") is not None else pd.NA,
-                        "6M": perf.get("6M") if perf.get("6M") is not None else pd.NA,
-                    }
-                    
-                    # Apply CAGR logic
-                    y1 = perf.get("1Y")
-                    y3 = perf.get("3Y")
-                    y5 = perf.get("5Y")
-                    
-                    if toggle_cagr:
-                        row["1Y"] = y1 if y1 is not None else pd.NA # 1Y CAGR is same as absolute
-                        row["3Y"] = (((1 + y3/100)**(1/3)) - 1)*100 if y3 is not None else pd.NA
-                        row["5Y"] = (((1 + y5/100)**(1/5)) - 1)*100 if y5 is not None else pd.NA
-                    else:
-                        row["1Y"] = y1 if y1 is not None else pd.NA
-                        row["3Y"] = y3 if y3 is not None else pd.NA
-                        row["5Y"] = y5 if y5 is not None else pd.NA
-                        
-                    # Add RS at the end
-                    row["RS (20D)"] = perf.get("RS (20D)") if perf.get("RS (20D)") is not None else pd.NA
-                    
-                    rows.append(row)
-                    
-                columns_list = ["Ticker", "1D", "1W", "1M", "3M", "6M", "1Y", "3Y", "5Y", "RS (20D)"]
-                df_perf = pd.DataFrame(rows, columns=columns_list)
+                # One reindex of the cached frame instead of a dict per ticker
+                df_perf = load_constituent_perf_frame().reindex(all_tickers)
+                if toggle_cagr:
+                    # 1Y CAGR is same as absolute
+                    df_perf[["3Y", "5Y"]] = (((1 + df_perf[["3Y", "5Y"]]/100)**(1/np.array([3, 5]))) - 1)*100
+                df_perf = df_perf.rename_axis("Ticker").reset_index()
+                df_perf["Ticker"] = make_tv_urls(df_perf["Ticker"])
+                
+                def color_perf_block(block):
+                    # Green/red/gray by sign for the whole block at once (NaN cells stay unstyled)
+                    vals = block.to_numpy(dtype=float)
+                    css = np.select(
+                        [vals > 0, vals < 0],
+                        ['color: #22c55e; font-family: monospace', 'color: #ef4444; font-family: monospace'],
+                        default='color: gray; font-family: monospace'
+                    )
+                    return pd.DataFrame(np.where(np.isnan(vals), '', css), index=block.index, columns=block.columns)
                 
                 if not df_perf.empty:
                     # Apply aesthetic number styling natively via HTML to bypass Data Grid bugs
-                    styler = df_perf.style.format({
-                        "1D": "{:+.2f}%", 
-                        "1W": "{:+.2f}%", 
-                        "1M": "{:+.2f}%", 
-                        "3M": "{:+.2f}%", 
-                        "6M": "{:+.2f}%",
-                        "1Y": "{:+.2f}%",
-                        "3Y": "{:+.2f}%",
-                        "5Y": "{:+.2f}%",
-                        "RS (20D)": "{:+.2f}%"
-                    }).map(
-                        lambda x: f"color: {'#22c55e' if x > 0 else '#ef4444' if x < 0 else 'gray'}; font-family: monospace" if pd.notnull(x) else "",
-                        subset=["1D", "1W", "1M", "3M", "6M", "1Y", "3Y", "5Y", "RS (20D)"]
-                    )
+                    # Columns are plain float64, so pandas' built-in formatter handles them (blank for missing)
+                    styler = df_perf.style.format("{:+.2f}%", na_rep="", subset=PERF_COLUMNS).apply(color_perf_block, axis=None, subset=PERF_COLUMNS)
                     st.dataframe(
                         styler,
                         column_config={
@@ -917,39 +1124,15 @@ else:
                     st.warning("No constituent performance data available.")
             else:
                 # Fallback to simple list if offline caching hasn't run yet
-                tickers = get_cached_constituents(selected_index)
+                tickers = index_tickers
                 
                 if tickers:
                     st.write(f"**Total Stocks:** {len(tickers)}")
                     if category == "Industries":
-                        tv_urls = [make_tv_url(t) for t in tickers]
-                        urls_js = json.dumps(tv_urls)
-                        html_code = f"""
-                        <div style="text-align: right; margin-bottom: 0px;">
-                            <button onclick="openAll()" style="background-color: #2563eb; color: white; border: none; padding: 0.5rem 1rem; border-radius: 4px; font-weight: bold; cursor: pointer; font-family: 'Inter', sans-serif; transition: background-color 0.2s;">
-                                ↗️ Open All in TradingView
-                            </button>
-                        </div>
-                        <script>
-                        function openAll() {{
-                            var urls = {urls_js};
-                            var blocked = false;
-                            urls.forEach(function(url) {{
-                                var newWin = window.open(url, '_blank');
-                                if (!newWin || newWin.closed || typeof newWin.closed == 'undefined') {{
-                                    blocked = true;
-                                }}
-                            }});
-                            if (blocked) {{
-                                alert("⚠️ Pop-up Blocker Detected!\\n\\nYour browser is preventing multiple tabs from opening at once.\\n\\nPlease click the Pop-up Blocker icon in your browser's address bar (typically on the right), select 'Always allow pop-ups and redirects from this site', and then try again.");
-                            }}
-                        }}
-                        </script>
-                        """
-                        components.html(html_code, height=45)
+                        components.html(open_all_button_html(tuple(make_tv_urls(tickers))), height=45)
                     
                     df_fallback = pd.DataFrame(tickers, columns=["Ticker Symbol"])
-                    df_fallback["Ticker Symbol"] = df_fallback["Ticker Symbol"].apply(make_tv_url)
+                    df_fallback["Ticker Symbol"] = make_tv_urls(df_fallback["Ticker Symbol"])
                     
                     st.dataframe(
                         df_fallback, 
@@ -5,6 +5,41 @@ import numpy as np
 import warnings
 from fetch_breadth_data import get_index_tickers, fetch_historical_data
 
+try:
+    import bottleneck as bn # Optional: fused moving-window kernels, several times faster than pandas rolling
+except ImportError:
+    bn = None
+
+try:
+    from numba import njit # Optional: compiles the cycle state machine
+except ImportError:
+    def njit(*args, **kwargs):
+        return args[0] if args and callable(args[0]) else (lambda func: func)
+
+@njit(cache=True)
+def find_cycles(breadth, start_idx):
+    """Entry/exit day indices of each cycle: enter when breadth crosses below 20%, exit when it crosses above 80%.
+
+    The last entry has no matching exit while its cycle is still open.
+    """
+    entries = np.empty(len(breadth), dtype=np.int64)
+    exits = np.empty(len(breadth), dtype=np.int64)
+    n_entries = 0
+    n_exits = 0
+    in_trade = False
+    for i in range(start_idx, len(breadth)):
+        pct = breadth[i]
+        prev_pct = breadth[i-1]
+        if not in_trade and pct < 20 and prev_pct >= 20:
+            in_trade = True
+            entries[n_entries] = i
+            n_entries += 1
+        elif in_trade and pct > 80 and prev_pct <= 80:
+            in_trade = False
+            exits[n_exits] = i
+            n_exits += 1
+    return entries[:n_entries], exits[:n_exits]
+
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 def backtest_nifty500_strategy():
@@ -28,18 +63,23 @@ def backtest_nifty500_strategy():
 
     # 3. Calculate 200 SMA & Breadth
     print("Calculating Technicals...")
-    sma_200 = full_data.rolling(window=200, min_periods=150).mean()
+    px = full_data.to_numpy(dtype=np.float64)
+    if bn is not None:
+        sma_arr = bn.move_mean(px, window=200, min_count=150, axis=0)
+    else:
+        sma_arr = full_data.rolling(window=200, min_periods=150).mean().to_numpy()
+    sma_200 = pd.DataFrame(sma_arr, index=full_data.index, columns=full_data.columns)
     
+    # Breadth Calculation on the raw arrays (no DataFrame alignment/metadata per comparison)
+    valid_universe = ~np.isnan(px) & ~np.isnan(sma_arr)
     # Boolean mask: Is Stock > SMA?
-    is_above = full_data > sma_200
-    
-    # Breadth Calculation
-    valid_universe = sma_200.notna() & full_data.notna()
-    counts_above = (is_above & valid_universe).sum(axis=1)
+    is_above = valid_universe & (px > sma_arr)
+    counts_above = is_above.sum(axis=1)
     counts_total = valid_universe.sum(axis=1)
     
-    breadth_pct = (counts_above / counts_total) * 100
-    breadth_pct = breadth_pct.fillna(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        breadth = np.where(counts_total > 0, (counts_above / counts_total) * 100, 0.0)
+    breadth_pct = pd.Series(breadth, index=full_data.index)
     
     # 4. Identify Market Cycles
     # Regimes:
@@ -66,8 +106,14 @@ def backtest_nifty500_strategy():
     start_idx = 250 
     
     prices_df = full_data
+    # Last valid price up to each date, computed once for every exit
+    prices_ff = prices_df.ffill()
     
-    for i in range(start_idx, len(dates)):
+    # Cycle boundaries are sparse (a few per decade): the scalar day-by-day state machine runs
+    # compiled in find_cycles, and only the entry/exit days are visited here
+    entry_days, exit_days = find_cycles(breadth_pct.to_numpy(dtype=np.float64), start_idx)
+    
+    for i in np.sort(np.concatenate([entry_days, exit_days])):
         date = dates[i]
         pct = breadth_pct.iloc[i]
         prev_pct = breadth_pct.iloc[i-1]
@@ -83,23 +129,12 @@ def backtest_nifty500_strategy():
             day_sma = sma_200.iloc[i]
             day_price = prices_df.iloc[i]
             
-            # Basket = Tickers where Price < SMA (and data exists)
-            # Using the boolean dataframe `is_above` directly
-            # ~is_above means Below (or NaN). Need to filter NaNs.
-            
-            basket = []
-            prices = {}
-            for t in tickers:
-                if t not in prices_df.columns: continue
-                # Must be valid
-                if pd.isna(day_price[t]) or pd.isna(day_sma[t]): continue
-                
-                if day_price[t] < day_sma[t]:
-                    basket.append(t)
-                    prices[t] = day_price[t]
+            # Basket = Tickers where Price < SMA (and data exists), one boolean mask over the row
+            below = day_price.notna() & day_sma.notna() & (day_price < day_sma) & day_price.index.isin(tickers)
+            basket = day_price.index[below].tolist()
             
             entry_basket = basket
-            entry_prices = prices
+            entry_prices = day_price[below].to_dict()
             
             print(f"Cycle Start: {date.date()} | Breadth: {pct:.2f}% | Basket Size: {len(basket)} stocks")
 
@@ -112,34 +147,16 @@ def backtest_nifty500_strategy():
             # Portfolio Value = Sum of (Exit Price / Entry Price) * 1 unit of currency?
             # Or Equal Weight: Total Return = Average of Individual Returns
             
-            day_price = prices_df.iloc[i]
+            buy_px = pd.Series(entry_prices, dtype=float)
             
-            stock_returns = []
-            valid_exits = 0
+            # Stock might have delisted or paused: sell at the last available price up to this date
+            # (0 if it never traded, which should not happen if we bought it)
+            sell_px = prices_ff.iloc[i].reindex(buy_px.index).fillna(0)
             
-            for t in entry_basket:
-                buy_px = entry_prices.get(t)
-                sell_px = day_price.get(t)
-                
-                if pd.isna(sell_px):
-                    # Stock might have delisted or paused.
-                    # Assumption: Sell at last available price or 0? 
-                    # Using last available price in dataset up to this date is safest approximation
-                    # Or just skip? Skipping implies 0 loss which is biased.
-                    # Let's count as -100%? No, too harsh for data gaps.
-                    # Let's look up last valid price.
-                    last_valid_idx = prices_df[t].loc[:date].last_valid_index()
-                    if last_valid_idx:
-                        sell_px = prices_df[t].loc[last_valid_idx]
-                    else:
-                        sell_px = 0 # Should not happen if we bought it
-                
-                if buy_px > 0:
-                    ret = (sell_px - buy_px) / buy_px
-                    stock_returns.append(ret)
-                    valid_exits += 1
+            traded = (buy_px > 0).to_numpy()
+            stock_returns = ((sell_px - buy_px) / buy_px).to_numpy()[traded]
             
-            avg_return = np.mean(stock_returns) if stock_returns else 0.0
+            avg_return = np.mean(stock_returns) if stock_returns.size else 0.0
             
             duration_days = (exit_date - entry_date).days
             
@@ -7,29 +7,19 @@ import io
 def check_n50():
     url = "https://nsearchives.nseindia.com/content/indices/ind_nifty50list.csv"
     s = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}).content
-    df = pd.read_csv(io.StringIO(s.decode('utf-8')))
-    tickers = [x + ".NS" for x in df['Symbol']]
+    df = pd.read_csv(io.BytesIO(s), usecols=['Symbol'], dtype=str)
+    tickers = df['Symbol'].dropna().add(".NS").tolist()
     print(f"Nifty 50 Tickers ({len(tickers)}):")
     
     # Download 1y data to check validity
     data = yf.download(tickers, period="1y", group_by='ticker', progress=False, threads=True)
     
-    missing = []
-    insufficient = []
+    # Flatten to one Close column per ticker once, then count valid days for all of them together
+    close = data.xs('Close', axis=1, level=1)
+    valid_days = close.notna().sum(axis=0)
     
-    for t in tickers:
-        try:
-            # Check availability
-            if t not in data.columns.levels[0]:
-                missing.append(t)
-                continue
-                
-            # Check count
-            valid_days = data[t]['Close'].notna().sum()
-            if valid_days < 150:
-                insufficient.append(f"{t} ({valid_days} days)")
-        except:
-            missing.append(t)
+    missing = [t for t in tickers if t not in close.columns]
+    insufficient = [f"{t} ({valid_days[t]} days)" for t in tickers if t in close.columns and valid_days[t] < 150]
             
     print("\nMissing/Failed Download:")
     print(missing)
@@ -1,5 +1,7 @@
 
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 
 sectors = {
     "NIFTY AUTO": "ind_niftyautolist.csv",
@@ -31,23 +33,32 @@ alternatives = {
 base_url = "https://nsearchives.nseindia.com/content/indices/"
 
 print("Checking URLs...")
-headers = {'User-Agent': 'Mozilla/5.0'}
 
-for name, filename in sectors.items():
-    found = False
+# One keep-alive session for every probe: same host, so the TCP/TLS handshake is paid once per pooled connection
+session = requests.Session()
+session.headers.update({'User-Agent': 'Mozilla/5.0'})
+session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=8))
+
+def probe(name, filename):
+    """First candidate file for `name` that answers 200, or None."""
     candidates = [filename] + alternatives.get(name, [])
     
     for fname in candidates:
         url = base_url + fname
         try:
-            r = requests.head(url, headers=headers, timeout=5)
+            r = session.head(url, timeout=5, allow_redirects=False)
             if r.status_code == 200:
-                print(f"[OK] {name}: {fname}")
-                found = True
-                break
+                return fname
         except:
             pass
-            
-    if not found:
-        print(f"[FAIL] {name}")
+    return None
 
+# Sectors are independent: probe them concurrently, report in the original order
+with ThreadPoolExecutor(max_workers=8) as executor:
+    results = executor.map(probe, sectors.keys(), sectors.values())
+    
+    for name, fname in zip(sectors, results):
+        if fname:
+            print(f"[OK] {name}: {fname}")
+        else:
+            print(f"[FAIL] {name}")
@@ -1,57 +1,122 @@
 import pandas as pd
+import numpy as np
 import yfinance as yf
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import io
+import csv
 import time
 import os
 import json
 import sys
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from nifty_themes import THEMES
+from nifty_themes import THEMES, THEME_FILES
+
+try:
+    import numexpr as ne # Optional: evaluates the breadth masks in one cache-blocked, multi-threaded pass
+except ImportError:
+    ne = None
+
+try:
+    import orjson # Optional: C-accelerated encoding of the status JSON
+except ImportError:
+    orjson = None
+
+try:
+    import bottleneck as bn # Optional: fused moving-window kernels, several times faster than pandas rolling
+except ImportError:
+    bn = None
+
+try:
+    from numba import njit, prange # Optional: compiles the fused breadth-count kernel
+    USE_NUMBA = True
+except ImportError:
+    USE_NUMBA = False
+    prange = range
+    def njit(*args, **kwargs):
+        return args[0] if args and callable(args[0]) else (lambda func: func)
+
+# pandas < 3 pads gaps in pct_change() by default; the streaming returns kernel implements the
+# pandas 3 (no padding) semantics, so it only replaces pct_change where those are the default
+STREAM_RETURNS = USE_NUMBA and int(pd.__version__.split(".")[0]) >= 3
+
+UPDATE_SENTINEL = "last_update.txt"
+
+# One pooled keep-alive session for every NSE CSV (same host), retrying transient 429/5xx with backoff
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
+# Per-ticker Close histories downloaded from Yahoo, appended to incrementally
+YF_CACHE_DIR = "cache"
+
+# NSE index constituents change a few times a year; reuse a fetched list for this many days
+CONSTITUENTS_SNAPSHOT = "sector_constituents.json"
+CONSTITUENTS_MAX_AGE_DAYS = 7
+_SNAPSHOT_LOCK = threading.Lock()
+
+def load_constituents_snapshot():
+    """{index_name: {"fetched": "YYYY-MM-DD", "tickers": [...]}} from the snapshot, or {}."""
+    try:
+        with open(CONSTITUENTS_SNAPSHOT, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_constituents_entry(index_name, tickers):
+    """Record a freshly fetched constituent list (read-modify-write under a lock, atomic replace)."""
+    with _SNAPSHOT_LOCK:
+        snapshot = load_constituents_snapshot()
+        snapshot[index_name] = {"fetched": datetime.now().date().isoformat(), "tickers": tickers}
+        tmp_path = CONSTITUENTS_SNAPSHOT + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, CONSTITUENTS_SNAPSHOT)
+
+# Garbage rows in the NSE lists (e.g. DUMMY placeholders), matched as substrings
+TICKER_BLOCKLIST = ("DUMMY",)
+# Ticker transformations for Yahoo Finance compatibility
+TICKER_OVERRIDES = {
+    "LTM": "LTIM"
+}
 
 def get_tickers_from_url(url):
     """Generic function to fetch tickers from NSE CSV URL."""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
     try:
         print(f"Fetching from {url}...")
-        response = requests.get(url, headers=headers, timeout=15)
+        response = _SESSION.get(url, timeout=15)
         response.raise_for_status()
-        df = pd.read_csv(io.StringIO(response.content.decode('utf-8')))
-        symbol_col = next((col for col in df.columns if 'Symbol' in col), None)
-        if symbol_col:
-            raw_tickers = df[symbol_col].dropna().astype(str).tolist()
-            cleaned_tickers = []
-            
-            for t in raw_tickers:
-                # Filter Garbage rows (e.g. DUMMY placeholders)
-                if "DUMMY" in t:
-                    continue
-                
-                # Ticker transformations for Yahoo Finance compatibility
-                overrides = {
-                    "LTM": "LTIM.NS"
-                }
-
-                if t in overrides:
-                    cleaned_tickers.append(overrides[t])
-                    continue
-
-                if t == "KWIL":
-                    cleaned_tickers.append("KWIL.NS")
-                    continue
-                
-                cleaned_tickers.append(t + ".NS")
-                        
-            return sorted(list(set(cleaned_tickers)))
+        # The lists are ~50-750 rows; stdlib csv avoids a DataFrame round-trip per list
+        reader = csv.reader(io.StringIO(response.content.decode('utf-8-sig')))
+        header = next(reader, [])
+        sym_idx = next((i for i, h in enumerate(header) if 'Symbol' in h), None)
+        if sym_idx is not None:
+            cleaned_tickers = {
+                TICKER_OVERRIDES.get(t, t) + ".NS"
+                for t in (row[sym_idx] for row in reader if len(row) > sym_idx)
+                if t and not any(b in t for b in TICKER_BLOCKLIST)
+            }
+            return sorted(cleaned_tickers)
         return []
     except Exception as e:
         print(f"Failed to fetch from {url}: {e}")
         return []
 
-def get_index_tickers(index_name):
-    """Get tickers for a specific index or theme."""
+def get_index_tickers(index_name, force_refresh=False):
+    """Get tickers for a specific index or theme.
+
+    NSE lists come from the constituents snapshot while it is under CONSTITUENTS_MAX_AGE_DAYS
+    old; force_refresh always re-fetches them.
+    """
     
     # Check Custom Themes first
     if index_name in THEMES:
@@ -91,18 +156,97 @@ def get_index_tickers(index_name):
 
     if index_name in sector_map:
         base_url = "https://nsearchives.nseindia.com/content/indices/"
+        if not force_refresh:
+            entry = load_constituents_snapshot().get(index_name)
+            if entry:
+                age = datetime.now().date() - datetime.fromisoformat(entry["fetched"]).date()
+                if age.days < CONSTITUENTS_MAX_AGE_DAYS:
+                    return entry["tickers"]
         # Nifty Smallcap 500 special check logic handled by map just pointing to 250 for now
-        return get_tickers_from_url(base_url + sector_map[index_name])
+        tickers = get_tickers_from_url(base_url + sector_map[index_name])
+        if tickers:
+            try:
+                save_constituents_entry(index_name, tickers)
+            except OSError as e:
+                print(f"Failed to update {CONSTITUENTS_SNAPSHOT}: {e}")
+        return tickers
         
     return []
 
+def master_database_path():
+    """Location of the local adjusted NSE Parquet database (server path first)."""
+    if os.path.exists("/home/ubuntu/NSE_data/nse_master_adjusted_2014_onwards.parquet"):
+        return "/home/ubuntu/NSE_data/nse_master_adjusted_2014_onwards.parquet"
+    return "/Users/sumeetdas/Antigravity_NSE_Data/nse_master_adjusted_2014_onwards.parquet"
+
+# Pivoted output of fetch_historical_data from the last run, reused while its inputs are unchanged
+MASTER_CACHE = os.path.join(YF_CACHE_DIR, "master_prices.parquet")
+# Hand-stitched pre-listing / pre-rename histories (Date, Close) spliced under the live columns
+STITCHED_HISTORIES = {
+    "TMPV.NS": "stitched_tmpv_history.csv",
+    "KWIL.NS": "stitched_kwil_history.csv",
+    "LTIM.NS": "stitched_ltm_history.csv",  # formerly LTI.NS
+}
+STITCHED_FILES = tuple(STITCHED_HISTORIES.values())
+
+def read_stitched_history(path):
+    """A stitched history CSV as a Close series indexed by Date."""
+    # Check if CSV has the standard Date,Close header or the non-standard Price,Close header
+    with open(path, "r") as f:
+        first_line = f.readline().strip()
+        
+    if first_line.startswith("Price"):
+        # Handle non-standard format: Skip first 3 rows (Price, Ticker, Date)
+        stitched_df = pd.read_csv(path, skiprows=3, names=["Date", "Close"])
+    else:
+        stitched_df = pd.read_csv(path)
+        
+    stitched_df['Date'] = pd.to_datetime(stitched_df['Date'])
+    return stitched_df.set_index('Date')['Close']
+
+def _latest_mtime(path):
+    """Newest mtime under path (a hive-partitioned dataset is a directory tree), or 0 if missing."""
+    if os.path.isdir(path):
+        return max((os.path.getmtime(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names), default=0)
+    return os.path.getmtime(path) if os.path.exists(path) else 0
+
+def fetch_historical_data_cached(tickers, start_date="2014-01-01"):
+    """fetch_historical_data, short-circuited to MASTER_CACHE when nothing it reads has changed.
+
+    The key covers the ticker set, start date, the database and stitched-history mtimes, and
+    this module's own mtime (the alias/scaling tables live in the code).
+    """
+    key = {
+        "tickers": sorted(tickers),
+        "start_date": start_date,
+        "database_mtime": _latest_mtime(master_database_path()),
+        "stitched_mtimes": [_latest_mtime(f) for f in STITCHED_FILES],
+        "code_mtime": _latest_mtime(os.path.abspath(__file__)),
+    }
+    key_path = os.path.splitext(MASTER_CACHE)[0] + ".json"
+    try:
+        with open(key_path, "r") as f:
+            if json.load(f) == key:
+                print(f"Reusing {MASTER_CACHE}: price database unchanged since the last run")
+                return pd.read_parquet(MASTER_CACHE, engine='pyarrow')
+    except (OSError, ValueError):
+        pass
+
+    full_data = fetch_historical_data(tickers, start_date=start_date)
+    if not full_data.empty:
+        try:
+            os.makedirs(YF_CACHE_DIR, exist_ok=True)
+            full_data.to_parquet(MASTER_CACHE, engine='pyarrow', compression='zstd')
+            with open(key_path, "w") as f:
+                json.dump(key, f)
+        except OSError as e:
+            print(f"Failed to write {MASTER_CACHE}: {e}")
+    return full_data
+
 def fetch_historical_data(tickers, start_date="2014-01-01"):
     """Fetch historical data for tickers using local adjusted Parquet database."""
     
-    if os.path.exists("/home/ubuntu/NSE_data/nse_master_adjusted_2014_onwards.parquet"):
-        parquet_path = "/home/ubuntu/NSE_data/nse_master_adjusted_2014_onwards.parquet"
-    else:
-        parquet_path = "/Users/sumeetdas/Antigravity_NSE_Data/nse_master_adjusted_2014_onwards.parquet"
+    parquet_path = master_database_path()
     
     # ── Symbol Alias Map (Support One-to-Many) ──────────────────────────
     # Format: { "OLD_HISTORICAL_SYMBOL": ["CANONICAL_SYMBOL_1", ...] }
@@ -231,40 +375,38 @@ def fetch_historical_data(tickers, start_date="2014-01-01"):
         # in the last 15 days, and use yfinance to surgically overwrite the column temporarily.
         recent_df = pivot_df.tail(15)
         pct_returns = recent_df.pct_change()
-        split_anomalies = []
-        
-        for col in pct_returns.columns:
-            if (pct_returns[col] < -0.45).any():
-                split_anomalies.append(col)
+        split_anomalies = pct_returns.columns[(pct_returns < -0.45).any()].tolist()
                 
         if split_anomalies:
             print(f"Self-Healing Triggered: Detected massive corporate action anomalies for {split_anomalies}")
-            for ticker in split_anomalies:
-                try:
-                    print(f"Fetching adjusted history for {ticker} from Yahoo Finance fallback...")
-                    # Fetch 5 years to correctly recalibrate 5Y Return metrics
-                    yf_data = yf.download(ticker, start=pivot_df.index[0], end=pivot_df.index[-1] + pd.Timedelta(days=1), progress=False, auto_adjust=True)
-                    if not yf_data.empty:
-                        if ticker in yf_data.columns.get_level_values(0):
-                            clean_series = yf_data[ticker]['Close']
-                        elif 'Close' in yf_data.columns.get_level_values(0):
-                            clean_series = yf_data['Close'].iloc[:, 0]
-                        elif 'Close' in yf_data.columns:
-                            clean_series = yf_data['Close']
-                        else:
-                            continue
-                            
-                        if clean_series.index.tz is not None:
-                            clean_series.index = clean_series.index.tz_localize(None)
-                        
-                        # Reindex clean_series perfectly to the Parquet dates to capture special weekend trading dates.
-                        # Forward-fill any YFinance missing dates using the previous trading day's true adjusted price.
-                        clean_series = clean_series.reindex(pivot_df.index).ffill().bfill()
-                        
-                        # Overwrite the broken Parquet column with the newly adjusted history securely
-                        pivot_df[ticker] = clean_series
-                except Exception as e:
-                    print(f"Failed to apply fallback for {ticker}: {e}")
+            print(f"Fetching adjusted history for {split_anomalies} from Yahoo Finance fallback...")
+            try:
+                # One batched request for every anomaly; fetch 5 years to correctly recalibrate 5Y Return metrics
+                yf_data = yf.download(split_anomalies, start=pivot_df.index[0], end=pivot_df.index[-1] + pd.Timedelta(days=1), progress=False, auto_adjust=True, group_by='ticker')
+                if yf_data.empty:
+                    close_panel = pd.DataFrame()
+                elif isinstance(yf_data.columns, pd.MultiIndex):
+                    # Every ticker's Close in one vectorized selection
+                    close_panel = yf_data.xs('Close', axis=1, level=1)
+                else:
+                    # Older yfinance returns flat columns for a single ticker
+                    close_panel = yf_data[['Close']].set_axis(split_anomalies, axis=1)
+            except Exception as e:
+                print(f"Failed to apply fallback for {split_anomalies}: {e}")
+                close_panel = pd.DataFrame()
+
+            if not close_panel.empty:
+                if close_panel.index.tz is not None:
+                    close_panel.index = close_panel.index.tz_localize(None)
+                
+                # Reindex the closes perfectly to the Parquet dates to capture special weekend trading dates.
+                # Forward-fill any YFinance missing dates using the previous trading day's true adjusted price.
+                close_panel = close_panel.reindex(pivot_df.index).ffill().bfill()
+                # Tickers Yahoo failed on come back all-NaN; they keep their Parquet history
+                close_panel = close_panel.loc[:, close_panel.notna().any()]
+                
+                # Overwrite the broken Parquet columns with the newly adjusted histories securely
+                pivot_df = pivot_df.assign(**{ticker: close_panel[ticker] for ticker in close_panel.columns})
                     
         full_data = pivot_df
         
@@ -272,116 +414,271 @@ def fetch_historical_data(tickers, start_date="2014-01-01"):
         print(f"Failed to scan Parquet database: {e}")
         return pd.DataFrame()
 
-    # === CUSTOM STITCHING LOGIC FOR TMPV.NS ===
-    if "TMPV.NS" in full_data.columns and os.path.exists("stitched_tmpv_history.csv"):
-        print("Injecting stitched history for TMPV.NS...")
+    # === CUSTOM STITCHING LOGIC (TMPV.NS, KWIL.NS, LTIM.NS formerly LTI.NS) ===
+    # Read every stitched history first, then splice them all in with one reindex onto the
+    # union of dates instead of a full-frame reindex + sort per ticker
+    stitched = {}
+    for ticker, path in STITCHED_HISTORIES.items():
+        if ticker in full_data.columns and os.path.exists(path):
+            print(f"Injecting stitched history for {ticker}...")
+            try:
+                # Nothing before the requested window (incremental runs start years after 2014)
+                stitched[ticker] = read_stitched_history(path).loc[start_date:]
+            except Exception as e:
+                print(f"Error injecting stitched {ticker} data: {e}")
+
+    if stitched:
         try:
-            stitched_df = pd.read_csv("stitched_tmpv_history.csv")
-            stitched_df['Date'] = pd.to_datetime(stitched_df['Date'])
-            stitched_df.set_index('Date', inplace=True)
-            stitched_series = stitched_df['Close']
-            
             # Reindex full_data to include older dates from stitched series if needed
-            full_data = full_data.reindex(full_data.index.union(stitched_series.index))
+            full_index = full_data.index
+            for stitched_series in stitched.values():
+                full_index = full_index.union(stitched_series.index)
+            extra_dates = full_index.difference(full_data.index)
+            if len(extra_dates) and full_data.index.is_monotonic_increasing and (
+                full_data.empty or extra_dates[-1] < full_data.index[0]
+            ):
+                # Usual case: the stitched history only predates the DB listing, so prepend the
+                # missing dates instead of re-aligning every column onto the union
+                full_data = pd.concat([full_data.iloc[:0].reindex(extra_dates), full_data])
+            elif len(extra_dates):
+                full_data = full_data.reindex(full_index)
+            if not full_data.index.is_monotonic_increasing:
+                full_data = full_data.sort_index()
             
             # Combine stitched data with live data (live data takes precedence)
-            full_data['TMPV.NS'] = full_data['TMPV.NS'].combine_first(stitched_series)
-            
-            # Sort again after union
-            full_data.sort_index(inplace=True)
-            print(f"Injected {len(stitched_series)} rows for TMPV.NS")
-            
+            full_data = full_data.assign(**{
+                ticker: full_data[ticker].combine_first(stitched_series)
+                for ticker, stitched_series in stitched.items()
+            })
+            for ticker, stitched_series in stitched.items():
+                print(f"Injected {len(stitched_series)} rows for {ticker}")
         except Exception as e:
-            print(f"Error injecting stitched TMPV data: {e}")
+            print(f"Error injecting stitched data: {e}")
+    # ==========================================
+    
+    return full_data
+
+def download_close_cached(ticker, start_date):
+    """Download a ticker's Close from Yahoo, reusing cache/<ticker>.parquet.
 
-    # === CUSTOM STITCHING LOGIC FOR KWIL.NS ===
-    if "KWIL.NS" in full_data.columns and os.path.exists("stitched_kwil_history.csv"):
-        print("Injecting stitched history for KWIL.NS...")
+    Only the days since the last cached bar are requested; the last bar itself is
+    re-fetched so a partial intraday close gets replaced. Only use this for series
+    that are never re-adjusted (indices) - split-adjusted histories change backwards.
+    Returns the yfinance group_by="ticker" shape: columns (ticker, 'Close').
+    """
+    cache_path = os.path.join(YF_CACHE_DIR, f"{ticker}.parquet")
+    cached = pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+    if os.path.exists(cache_path):
         try:
-            stitched_df = pd.read_csv("stitched_kwil_history.csv")
-            stitched_df['Date'] = pd.to_datetime(stitched_df['Date'])
-            stitched_df.set_index('Date', inplace=True)
-            stitched_series = stitched_df['Close']
-            
-            full_data = full_data.reindex(full_data.index.union(stitched_series.index))
-            full_data['KWIL.NS'] = full_data['KWIL.NS'].combine_first(stitched_series)
-            
-            full_data.sort_index(inplace=True)
-            print(f"Injected {len(stitched_series)} rows for KWIL.NS")
-            
+            cached = pd.read_parquet(cache_path, engine='pyarrow').set_index('Date')['Close']
         except Exception as e:
-            print(f"Error injecting stitched KWIL data: {e}")
-    # ==========================================
+            print(f"Ignoring unreadable cache {cache_path}: {e}")
 
-    # === CUSTOM STITCHING LOGIC FOR LTIM.NS (formerly LTI.NS) ===
-    if "LTIM.NS" in full_data.columns and os.path.exists("stitched_ltm_history.csv"):
-        print("Injecting stitched history for LTIM.NS (from LTI.NS)...")
+    fetch_start = cached.index.max() if not cached.empty else pd.Timestamp(start_date)
+    try:
+        new = yf.download(ticker, start=fetch_start, group_by="ticker", threads=False, progress=False)
+    except Exception as e:
+        # A missing benchmark only blanks the RS metrics; fall back to whatever is cached
+        print(f"Failed to download {ticker}: {e}")
+        new = pd.DataFrame()
+    if not new.empty:
+        if ticker in new.columns.get_level_values(0):
+            new_close = new[ticker]['Close']
+        else:
+            new_close = new['Close'][ticker]
+        if new_close.index.tz is not None:
+            new_close.index = new_close.index.tz_localize(None)
+        close = pd.concat([cached, new_close.dropna()])
+        close = close[~close.index.duplicated(keep='last')]
+        # new bars start at the last cached one, so this is normally already in order
+        if not close.index.is_monotonic_increasing:
+            close = close.sort_index()
         try:
-            # Check if CSV has the standard Date,Close header or the non-standard Price,Close header
-            with open("stitched_ltm_history.csv", "r") as f:
-                first_line = f.readline().strip()
-                
-            if first_line.startswith("Price"):
-                # Handle non-standard format: Skip first 3 rows (Price, Ticker, Date)
-                stitched_df = pd.read_csv("stitched_ltm_history.csv", skiprows=3, names=["Date", "Close"])
-            else:
-                stitched_df = pd.read_csv("stitched_ltm_history.csv")
-                
-            stitched_df['Date'] = pd.to_datetime(stitched_df['Date'])
-            stitched_df.set_index('Date', inplace=True)
-            stitched_series = stitched_df['Close']
-            
-            full_data = full_data.reindex(full_data.index.union(stitched_series.index))
-            full_data['LTIM.NS'] = full_data['LTIM.NS'].combine_first(stitched_series)
-            
-            full_data.sort_index(inplace=True)
-            print(f"Injected {len(stitched_series)} rows for LTIM.NS")
-            
+            os.makedirs(YF_CACHE_DIR, exist_ok=True)
+            close.rename_axis('Date').rename('Close').reset_index().to_parquet(
+                cache_path, engine='pyarrow', compression='snappy', index=False
+            )
         except Exception as e:
-            print(f"Error injecting stitched LTIM data: {e}")
-    # ==========================================
-    
-    return full_data
+            print(f"Failed to write cache {cache_path}: {e}")
+    else:
+        close = cached
+
+    if close.empty:
+        return pd.DataFrame()
+    close = close[close.index >= pd.Timestamp(start_date)]
+    if close.empty:
+        return pd.DataFrame()
+    return pd.concat({ticker: close.rename('Close').to_frame()}, axis=1)
+
+@njit(parallel=True, cache=True)
+def breadth_counts(prices, smas):
+    """Per-day (above, valid, priced) counts in one pass over C-ordered T x N price/SMA arrays.
+
+    Rows are independent, so they are split across threads without any shared counters.
+    """
+    n_rows, n_cols = prices.shape
+    above = np.zeros(n_rows, dtype=np.int64)
+    valid = np.zeros(n_rows, dtype=np.int64)
+    priced = np.zeros(n_rows, dtype=np.int64)
+    for i in prange(n_rows):
+        n_above = 0
+        n_valid = 0
+        n_priced = 0
+        for j in range(n_cols):
+            p = prices[i, j]
+            if p == p:
+                n_priced += 1
+                s = smas[i, j]
+                if s == s:
+                    n_valid += 1
+                    if p > s:
+                        n_above += 1
+        above[i] = n_above
+        valid[i] = n_valid
+        priced[i] = n_priced
+    return above, valid, priced
+
+def row_counts(mask):
+    """True count per row of a 2-D bool mask.
+
+    On NumPy >= 2.0 the mask is bit-packed (8 tickers per byte) and popcounted, which
+    beats summing one bool byte per ticker.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(np.packbits(mask, axis=1)).sum(axis=1, dtype=np.int64)
+    return np.count_nonzero(mask, axis=1)
+
+@njit(parallel=True, cache=True, error_model='numpy')
+def row_mean_pct_change(prices):
+    """Per-day mean of the constituents' pct_change, without building the returns matrix.
 
-def calculate_breadth(full_data):
-    """Calculate market breadth metrics and Equal-Weighted Index."""
+    Same semantics as pandas >= 3 pct_change() (no padding): a return needs both days'
+    prices. Days with no valid return are NaN.
+    """
+    n_rows, n_cols = prices.shape
+    out = np.full(n_rows, np.nan)
+    for i in prange(1, n_rows):
+        total = 0.0
+        count = 0
+        for j in range(n_cols):
+            prev = np.float64(prices[i - 1, j])
+            r = np.float64(prices[i, j]) / prev - 1.0
+            if r == r:
+                total += r
+                count += 1
+        if count > 0:
+            out[i] = total / count
+    return out
+
+@njit(parallel=True, nogil=True, cache=True)
+def rolling_mean_kernel(values, window, min_periods):
+    """NaN-skipping trailing mean per column, O(T) per column via a running sum.
+
+    Mirrors pandas' rolling mean: Kahan-compensated sum, and a window whose valid values
+    are all equal returns that value exactly (so price == SMA ties match pandas).
+    """
+    n_rows, n_cols = values.shape
+    out = np.empty((n_rows, n_cols), dtype=np.float64)
+    for j in prange(n_cols):
+        total = 0.0
+        comp = 0.0
+        count = 0
+        run_value = np.nan
+        run_length = 0
+        for i in range(n_rows):
+            if i >= window:
+                old = values[i - window, j]
+                if old == old:
+                    count -= 1
+                    y = -old - comp
+                    t = total + y
+                    comp = t - total - y
+                    total = t
+            x = values[i, j]
+            if x == x:
+                count += 1
+                y = x - comp
+                t = total + y
+                comp = t - total - y
+                total = t
+                if x == run_value:
+                    run_length += 1
+                else:
+                    run_value = x
+                    run_length = 1
+            if count == 0:
+                total = 0.0
+                comp = 0.0
+            if count >= min_periods and count > 0:
+                out[i, j] = run_value if run_length >= count else total / count
+            else:
+                out[i, j] = np.nan
+    return out
+
+def compute_sma_200(full_data):
+    """200-day SMA per column; min_periods=150 allows for some missing data (holidays, trading suspensions)."""
+    if USE_NUMBA:
+        sma_arr = rolling_mean_kernel(np.ascontiguousarray(full_data.to_numpy(dtype=np.float64)), 200, 150)
+    elif bn is not None:
+        sma_arr = bn.move_mean(full_data.to_numpy(), window=200, min_count=150, axis=0)
+    else:
+        return full_data.rolling(window=200, min_periods=150).mean()
+    return pd.DataFrame(sma_arr, index=full_data.index, columns=full_data.columns)
+
+def calculate_breadth(full_data, sma_200=None, daily_returns=None):
+    """Calculate market breadth metrics and Equal-Weighted Index.
+
+    sma_200 and daily_returns may be passed in pre-computed (same index and columns as
+    full_data) so a ticker shared by many groups has its rolling mean and returns
+    computed only once per run.
+    """
     # 1. Calculate 200 SMA
-    # min_periods=150 allows for some missing data (holidays, trading suspensions)
-    sma_200 = full_data.rolling(window=200, min_periods=150).mean()
+    if sma_200 is None:
+        sma_200 = compute_sma_200(full_data)
     
-    # 2. Compare Close vs SMA
-    is_above = full_data > sma_200
-    
-    # 3. Valid Universe per day: Stocks that have a valid Price AND a valid SMA on that day
-    valid_universe = sma_200.notna() & full_data.notna()
-    
-    # 4. Count
-    above_count = (is_above & valid_universe).sum(axis=1)
-    
-    # Total valid stocks on that day (have SMA)
-    total_valid = valid_universe.sum(axis=1)
-    
-    # Calculate Below
-    below_count = total_valid - above_count
-    
-    # New Stocks (have price but no SMA)
-    new_stock_universe = full_data.notna() & sma_200.isna()
-    new_stock_count = new_stock_universe.sum(axis=1)
+    # 2-4. Count on the raw arrays. NaN compares False, so "price > SMA" only holds on the
+    # valid universe (stocks with a valid Price AND a valid SMA on that day).
+    prices = full_data.to_numpy()
+    smas = sma_200.to_numpy()
+    if USE_NUMBA:
+        above, valid, priced = breadth_counts(np.ascontiguousarray(prices), np.ascontiguousarray(smas))
+    elif ne is not None:
+        arrays = {'p': prices, 's': smas}
+        above = ne.evaluate("p > s", local_dict=arrays).sum(axis=1)
+        valid = ne.evaluate("(p == p) & (s == s)", local_dict=arrays).sum(axis=1)
+        priced = ne.evaluate("p == p", local_dict=arrays).sum(axis=1)
+    else:
+        has_price = ~np.isnan(prices)
+        above = row_counts(prices > smas)
+        valid = row_counts(has_price & ~np.isnan(smas))
+        priced = row_counts(has_price)
+
+    # Calculate Below (stocks with a valid SMA that are not above it)
+    below = valid - above
     
-    # True Total that the dashboard will display (Above + Below + New Stock)
-    total_trading = total_valid + new_stock_count
+    # True Total that the dashboard will display (Above + Below + New Stock), i.e. every
+    # stock with a price; new stocks (price but no SMA) are priced - valid
+    total_trading = priced
     
-    # Percentage (only uses valid_universe since new stocks can't be above/below)
-    percentage = (above_count / total_valid) * 100
-    percentage = percentage.fillna(0)
+    # Percentage (only uses valid_universe since new stocks can't be above/below); 0 on days
+    # with no valid stock, guarded inside the divide instead of a NaN + fillna pass
+    percentage = np.zeros(len(valid), dtype=np.float64)
+    np.divide(above, valid, out=percentage, where=valid > 0)
+    percentage *= 100
     
     # 5. Calculate Equal-Weighted Index History
-    # Calculate daily percent change for each stock
-    daily_returns = full_data.pct_change()
-    
     # Average daily return of the constituent stocks (Equal Weight)
-    # We use mean(axis=1) to get the daily index return
-    index_daily_return = daily_returns.mean(axis=1)
+    # Row mean accumulated in float64: the float32 returns would otherwise make the
+    # ~3000-step cumprod below drift
+    if daily_returns is None and STREAM_RETURNS:
+        row_mean = row_mean_pct_change(np.ascontiguousarray(prices))
+    else:
+        if daily_returns is None:
+            daily_returns = full_data.pct_change()
+        returns = daily_returns.to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            row_mean = np.nansum(returns, axis=1, dtype=np.float64) / row_counts(~np.isnan(returns))
+    index_daily_return = pd.Series(row_mean, index=full_data.index)
     
     # Compute cumulative index value starting at 100
     # (1 + r).cumprod() * 100
@@ -389,12 +686,12 @@ def calculate_breadth(full_data):
     index_close = (1 + index_daily_return.fillna(0)).cumprod() * 100
     
     breadth_df = pd.DataFrame({
-        'Above': above_count,
-        'Below': below_count,
+        'Above': above,
+        'Below': below,
         'Total': total_trading,
         'Percentage': percentage,
-        'Index_Close': index_close
-    })
+        'Index_Close': index_close.to_numpy()
+    }, index=full_data.index)
     
     # --- HOLIDAY FILTERING ---
     # Filter out holidays where only a handful of stocks have data.
@@ -415,28 +712,20 @@ def calculate_breadth(full_data):
     breadth_df = breadth_df[valid_sma_count > 0]
     
     
-    # 6. Extract Latest Detailed Status (Above/Below)
-    last_idx = -1
+    # 6. Extract Latest Detailed Status (Above/Below) from the last row of the same arrays
     if not full_data.empty:
-        latest_prices = full_data.iloc[last_idx]
-        latest_smas = sma_200.iloc[last_idx]
-        
-        above_list = []
-        below_list = []
-        new_stock_list = []
+        latest_prices = prices[-1]
+        latest_smas = smas[-1]
+        has_price = ~np.isnan(latest_prices)
+        has_sma = ~np.isnan(latest_smas)
+        is_above = latest_prices > latest_smas
+        # Interned so the ~30 groups' lists share one str object per ticker
+        tickers = np.array([sys.intern(t) for t in full_data.columns], dtype=object)
         
-        for ticker in full_data.columns:
-            price = latest_prices.get(ticker)
-            sma = latest_smas.get(ticker)
-            
-            if pd.notna(price) and pd.notna(sma):
-                if price > sma:
-                    above_list.append(ticker)
-                else:
-                    below_list.append(ticker)
-            elif pd.notna(price):
-                # Stock has a valid price but no SMA yet (e.g., recent IPO/listing)
-                new_stock_list.append(ticker)
+        above_list = tickers[has_price & has_sma & is_above].tolist()
+        below_list = tickers[has_price & has_sma & ~is_above].tolist()
+        # Stock has a valid price but no SMA yet (e.g., recent IPO/listing)
+        new_stock_list = tickers[has_price & ~has_sma].tolist()
     else:
         above_list, below_list, new_stock_list = [], [], []
 
@@ -488,77 +777,85 @@ def calculate_constituent_performance(master_data, all_tickers, nifty_data):
         except Exception as e:
             print(f"Warning: Failed to extract Nifty baseline for RS calculations: {e}")
                  
-    for ticker in all_tickers:
-        if ticker not in master_data.columns:
-            continue
-            
-        ticker_series = master_data[ticker].dropna()
-        if ticker_series.empty:
-            continue
-            
-        latest_val = ticker_series.iloc[-1]
-        current_date = ticker_series.index[-1]
-        
-        metrics = {}
-        
-        # Absolute Returns (Calendar Days)
+    tickers = [t for t in dict.fromkeys(all_tickers) if t in master_data.columns]
+    prices = master_data[tickers].to_numpy(dtype=np.float64)
+    present = ~np.isnan(prices)
+    n_valid = present.sum(axis=0)
+    has_data = n_valid > 0
+    tickers = [t for t, keep in zip(tickers, has_data) if keep]
+    prices, present, n_valid = prices[:, has_data], present[:, has_data], n_valid[has_data]
+    cols = np.arange(len(tickers))
+    
+    # Row of each ticker's last valid price at or before every date (-1 before its first one),
+    # so "last price on or before a date" is one gather per period for all tickers
+    rows = np.arange(len(prices))[:, None]
+    last_valid_row = np.maximum.accumulate(np.where(present, rows, -1), axis=0)
+    
+    def values_at(row_idx):
+        """Prices at per-ticker rows; NaN where the row is -1 (no price)."""
+        return np.where(row_idx >= 0, prices[row_idx, cols], np.nan)
+    
+    latest_row = last_valid_row[-1] if len(prices) else np.zeros(0, dtype=np.intp)
+    latest_val = values_at(latest_row)
+    current_dates = master_data.index[latest_row]
+    
+    metrics = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Absolute Returns (Calendar Days), from the last price on or before the target date
         for p_name, days in periods.items():
-            target_date = current_date - timedelta(days=days)
-            mask = ticker_series.index <= target_date
-            if mask.any():
-                past_val = ticker_series[mask].iloc[-1]
-                if past_val > 0:
-                    metrics[p_name] = ((latest_val - past_val) / past_val) * 100
-                else:
-                    metrics[p_name] = None
-            else:
-                metrics[p_name] = None
-                
-        # RS (5D) against Nifty 50 (Trading Days)
-        rs_5 = None
-        if nifty_latest > 0 and nifty_5d > 0 and len(ticker_series) >= 6:
-            t_past_val = ticker_series.iloc[-6]
-            if t_past_val > 0:
-                current_ratio = latest_val / nifty_latest
-                past_ratio = t_past_val / nifty_5d
-                rs_5 = ((current_ratio - past_ratio) / past_ratio) * 100
-        metrics["RS (5D)"] = rs_5
-
-        # RS (10D) against Nifty 50 (Trading Days)
-        rs_10 = None
-        if nifty_latest > 0 and nifty_10d > 0 and len(ticker_series) >= 11:
-            t_past_val = ticker_series.iloc[-11]
-            if t_past_val > 0:
-                current_ratio = latest_val / nifty_latest
-                past_ratio = t_past_val / nifty_10d
-                rs_10 = ((current_ratio - past_ratio) / past_ratio) * 100
-        metrics["RS (10D)"] = rs_10
-
-        # RS (20D) against Nifty 50 (Trading Days)
-        rs_20 = None
-        if nifty_latest > 0 and nifty_20d > 0 and len(ticker_series) >= 21:
-            t_past_val = ticker_series.iloc[-21]
-            if t_past_val > 0:
-                current_ratio = latest_val / nifty_latest
-                past_ratio = t_past_val / nifty_20d
-                rs_20 = ((current_ratio - past_ratio) / past_ratio) * 100
-        metrics["RS (20D)"] = rs_20
-
-        # RS (50D) against Nifty 50 (Trading Days)
-        rs_50 = None
-        if nifty_latest > 0 and nifty_50d > 0 and len(ticker_series) >= 51:
-            t_past_val = ticker_series.iloc[-51]
-            if t_past_val > 0:
-                current_ratio = latest_val / nifty_latest
-                past_ratio = t_past_val / nifty_50d
-                rs_50 = ((current_ratio - past_ratio) / past_ratio) * 100
-        metrics["RS (50D)"] = rs_50
+            target_pos = master_data.index.searchsorted(current_dates - timedelta(days=days), side='right') - 1
+            past_val = values_at(np.where(target_pos >= 0, last_valid_row[target_pos, cols], -1))
+            metrics[p_name] = np.where(past_val > 0, ((latest_val - past_val) / past_val) * 100, np.nan)
         
-        perf_dict[ticker] = metrics
+        # RS against Nifty 50 (Trading Days): each ticker's price k valid sessions back
+        valid_rank = np.cumsum(present, axis=0)
+        for label, k, nifty_past in (("RS (5D)", 6, nifty_5d), ("RS (10D)", 11, nifty_10d),
+                                     ("RS (20D)", 21, nifty_20d), ("RS (50D)", 51, nifty_50d)):
+            if not (nifty_latest > 0 and nifty_past > 0):
+                metrics[label] = np.full(len(tickers), np.nan)
+                continue
+            enough = n_valid >= k
+            past_row = np.argmax(valid_rank >= (n_valid - k + 1), axis=0)
+            t_past_val = values_at(np.where(enough, past_row, -1))
+            current_ratio = latest_val / nifty_latest
+            past_ratio = t_past_val / nifty_past
+            metrics[label] = np.where(t_past_val > 0, ((current_ratio - past_ratio) / past_ratio) * 100, np.nan)
+    
+    # NaN marks a metric that could not be computed; the JSON carries those as null
+    metric_lists = {name: [None if v != v else v for v in values.tolist()] for name, values in metrics.items()}
+    for i, ticker in enumerate(tickers):
+        perf_dict[ticker] = {name: values[i] for name, values in metric_lists.items()}
         
     return perf_dict
 
-def main():
+# Incremental runs still need 5 years of prices for the 5Y constituent returns (which also
+# covers the 200-day SMA warm-up before the last stored date)
+INCREMENTAL_LOOKBACK_DAYS = 5 * 365 + 30
+
+def load_existing_breadth(filename):
+    """A group's stored breadth history indexed by Date (newer of Parquet twin / CSV), or None."""
+    parquet_path = os.path.splitext(filename)[0] + ".parquet"
+    try:
+        if os.path.exists(parquet_path) and (
+            not os.path.exists(filename) or os.path.getmtime(parquet_path) >= os.path.getmtime(filename)
+        ):
+            return pd.read_parquet(parquet_path, engine='pyarrow').set_index('Date')
+        if os.path.exists(filename):
+            return pd.read_csv(filename, index_col='Date', parse_dates=True)
+    except Exception as e:
+        print(f"Failed to read existing {filename}: {e}")
+    return None
+
+def update_all(force_refresh=False, output_format="both", incremental=False):
+    """Rebuild every breadth CSV/Parquet and the status/performance JSONs.
+
+    Returns False if no price data could be fetched at all. Importable so the dashboard
+    can run an update in-process instead of spawning a new interpreter. force_refresh
+    re-fetches NSE constituent lists even when the snapshot is still fresh; output_format
+    ("both", "parquet" or "csv") picks which per-group files are written. incremental
+    only reads the last INCREMENTAL_LOOKBACK_DAYS of prices and appends the days after
+    each group's stored history (falls back to a full rebuild if any group has none).
+    """
     # 1. Define all tasks
     broad_indices = [
         ("Nifty 50", "market_breadth_nifty50.csv"),
@@ -589,14 +886,8 @@ def main():
     ]
     
     # Add Themes to list (Name, CSV Name)
-    # CSV name = breadth_theme_name_sanitized.csv
-    theme_indices = []
-    sorted_themes = sorted(THEMES.keys())
-    for theme_name in sorted_themes:
-        # Sanitize filename
-        safe_name = theme_name.lower().replace(" ", "_").replace("&", "and").replace("-", "_").replace("(", "").replace(")", "").replace("__", "_")
-        filename = f"breadth_theme_{safe_name}.csv"
-        theme_indices.append((theme_name, filename))
+    # CSV names are sanitized once in nifty_themes, shared with the dashboard
+    theme_indices = [(theme_name, THEME_FILES[theme_name]) for theme_name in sorted(THEMES)]
         
     all_tasks = broad_indices + sector_indices + theme_indices
     
@@ -611,8 +902,10 @@ def main():
     task_map = {} # Name -> [Tickers]
     
     print("Gathering ticker lists...")
-    for name, filename in all_tasks:
-        tickers = get_index_tickers(name)
+    # The ~22 NSE constituent CSVs are network-bound, so fetch them concurrently (map keeps task order)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        fetched = list(executor.map(lambda name: get_index_tickers(name, force_refresh), [name for name, _ in all_tasks]))
+    for (name, filename), tickers in zip(all_tasks, fetched):
         if tickers:
             task_map[name] = tickers
             all_tickers.update(tickers)
@@ -621,73 +914,219 @@ def main():
 
     print(f"Total Unique Tickers to fetch: {len(all_tickers)}")
     
-    master_data = fetch_historical_data(list(all_tickers), start_date="2014-01-01")
-    
-    if master_data.empty:
-        print("CRITICAL: No data fetched at all. Exiting with Error.")
-        sys.exit(1)
+    existing = {}
+    if incremental:
+        for name, filename in all_tasks:
+            if name in task_map:
+                prior = load_existing_breadth(filename)
+                if prior is None or prior.empty:
+                    print(f"Incremental: no stored history for {name}, rebuilding everything")
+                    existing = {}
+                    break
+                existing[filename] = prior
 
+    start_date = "2014-01-01"
+    if existing:
+        oldest_last = min(prior.index.max() for prior in existing.values())
+        start_date = (oldest_last - pd.Timedelta(days=INCREMENTAL_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+        print(f"Incremental: reading prices from {start_date}")
+
+    # The benchmark download is network-bound and independent of the local price scan, so
+    # it runs in the background while the master data is read
     print("Fetching benchmark data for RS calculations (^NSEI)...")
-    nifty_data = yf.download("^NSEI", start="2023-01-01", group_by="ticker", threads=False)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        nifty_future = executor.submit(download_close_cached, "^NSEI", start_date="2023-01-01")
+        master_data = fetch_historical_data_cached(list(all_tickers), start_date=start_date)
+        
+        if master_data.empty:
+            print("CRITICAL: No data fetched at all. Exiting with Error.")
+            return False
+
+        try:
+            nifty_data = nifty_future.result()
+        except Exception as e:
+            print(f"Warning: benchmark data unavailable, RS metrics will be blank: {e}")
+            nifty_data = pd.DataFrame()
 
     print("Pre-calculating constituent performance metrics (1D to 5Y)...")
     constituent_perf = calculate_constituent_performance(master_data, all_tickers, nifty_data)
 
+    # Breadth only needs the ~7 significant digits the float32 parquet source carries; halves the
+    # rolling pass and every per-group slice (the JSON metrics above were computed in float64)
+    master_data = master_data.astype(np.float32)
+
+    # The SMA is per-column, so compute it once for every ticker instead of once per group it belongs to
+    master_sma = compute_sma_200(master_data)
+    # Same for the daily returns behind each group's equal-weight index (unless the numba
+    # kernel streams them per group straight from the prices)
+    master_returns = None if STREAM_RETURNS else master_data.pct_change()
+
+    # Hashed once for the per-group constituent filtering below
+    master_columns = set(master_data.columns)
+
     # Store detailed status for UI
     market_details = {}
+    # Long-format closes of every group, saved as all_closes.parquet for the dashboard heatmap
+    closes_frames = []
     
-    # Process each task using Master Data
-    print("\nProcessing Breadth for all groups...")
-    for name, filename in all_tasks:
+    def process_group(task):
+        """Breadth + CSV/Parquet export for one group; returns (breadth_df, details) or None."""
+        name, filename = task
         try:
             # Check if file exists and skip if needed? No, user wants rebuild.
             
             if name not in task_map:
-                continue
+                return None
                 
             tickers = task_map[name]
             # Filter master data for these tickers
             # Intersect with columns present in master_data
-            available_tickers = [t for t in tickers if t in master_data.columns]
+            available_tickers = [t for t in tickers if t in master_columns]
             
             if not available_tickers:
                 print(f"Skipping {name}: No data for constituent tickers.")
-                continue
+                return None
                 
-            subset_data = master_data[available_tickers].copy()
+            subset_data = master_data[available_tickers]
             
             # Check if sufficient data
             if subset_data.empty:
-                continue
+                return None
                 
-            breadth_df, above_list, below_list, new_stock_list = calculate_breadth(subset_data)
-            breadth_df.to_csv(filename)
-            print(f"Saved {filename} ({name})")
-            
-            market_details[name] = {
+            breadth_df, above_list, below_list, new_stock_list = calculate_breadth(
+                subset_data, master_sma[available_tickers],
+                None if master_returns is None else master_returns[available_tickers]
+            )
+            details = {
                 "above": above_list,
                 "below": below_list,
                 "new_stock": new_stock_list
             }
+
+            prior = existing.get(filename)
+            if prior is not None:
+                last_date = prior.index.max()
+                if last_date not in breadth_df.index:
+                    print(f"Keeping {filename} as is: {last_date.date()} is not in the incremental window (rerun without --incremental)")
+                    return prior, details
+                new_rows = breadth_df[breadth_df.index > last_date].copy()
+                # The window's Index_Close restarts at 100; chain it onto the stored level
+                new_rows['Index_Close'] *= prior['Index_Close'].iloc[-1] / breadth_df.at[last_date, 'Index_Close']
+                if output_format != "parquet" and os.path.exists(filename):
+                    new_rows.to_csv(filename, mode='a', header=False)
+                elif output_format != "parquet":
+                    pd.concat([prior, new_rows]).to_csv(filename)
+                breadth_df = pd.concat([prior, new_rows])
+                breadth_df.index.name = 'Date'
+            elif output_format != "parquet":
+                breadth_df.to_csv(filename)
+            if output_format != "csv":
+                # Columnar twin read by the dashboard (the CSV stays as the compatibility export)
+                breadth_df.rename_axis('Date').reset_index().to_parquet(
+                    os.path.splitext(filename)[0] + ".parquet", engine='pyarrow', compression='zstd', index=False
+                )
+            print(f"Saved {filename} ({name})")
+            
+            return breadth_df, details
             
         except Exception as e:
             print(f"Failed to process {name}: {e}")
+            return None
+
+    # Process each task using Master Data. Threads rather than processes: the groups share
+    # master_data/master_sma read-only (no pickling), numpy and the parquet writer release the
+    # GIL, and update_all() also runs inside the dashboard where forking is unsafe.
+    # With numba the groups run one at a time: the kernels are already multi-threaded, and
+    # numba's fallback workqueue threading layer aborts the process if two threads enter
+    # parallel kernels at once.
+    print("\nProcessing Breadth for all groups...")
+    if USE_NUMBA:
+        results = [process_group(task) for task in all_tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+            results = list(executor.map(process_group, all_tasks))
+    for (name, filename), result in zip(all_tasks, results):
+        if result is None:
+            continue
+        breadth_df, details = result
+        closes_frames.append(breadth_df[['Index_Close']].rename_axis('Date').reset_index().assign(Ticker=name))
+        market_details[name] = details
+
+    # Save the pre-aggregated closes (one columnar read instead of ~130 file opens in the app)
+    if closes_frames:
+        try:
+            all_closes = pd.concat(closes_frames, ignore_index=True)[['Ticker', 'Date', 'Index_Close']]
+            # float32 is what the dashboard computes with; halves the file and its read
+            all_closes['Index_Close'] = all_closes['Index_Close'].astype('float32')
+            all_closes.to_parquet("all_closes.parquet", engine='pyarrow', compression='zstd', index=False)
+            print("Saved all_closes.parquet")
+        except Exception as e:
+            print(f"Failed to save all_closes.parquet: {e}")
 
     # Save detailed status JSON
     try:
-        with open("market_status_latest.json", "w") as f:
-            json.dump(market_details, f, indent=4)
+        # 2-space indent: identical bytes from orjson and the stdlib fallback
+        if orjson is not None:
+            status_json = orjson.dumps(market_details, option=orjson.OPT_INDENT_2)
+        else:
+            status_json = json.dumps(market_details, indent=2).encode()
+        with open("market_status_latest.json", "wb") as f:
+            f.write(status_json)
         print("Saved market_status_latest.json")
     except Exception as e:
         print(f"Failed to save JSON: {e}")
 
     # Save constituent performance JSON
     try:
-        with open("constituent_performance_latest.json", "w") as f:
-            json.dump(constituent_perf, f, indent=4)
+        # Same 2-space layout as the status JSON; the metrics are plain floats/None
+        if orjson is not None:
+            perf_json = orjson.dumps(constituent_perf, option=orjson.OPT_INDENT_2)
+        else:
+            perf_json = json.dumps(constituent_perf, indent=2).encode()
+        with open("constituent_performance_latest.json", "wb") as f:
+            f.write(perf_json)
         print("Saved constituent_performance_latest.json")
     except Exception as e:
         print(f"Failed to save performance JSON: {e}")
 
+    # Sentinel read by the dashboard to skip its staleness check for the rest of the day
+    with open(UPDATE_SENTINEL, "w") as f:
+        f.write(datetime.now().date().isoformat())
+
+    return True
+
+# Background update state for the dashboard. It lives here rather than in app.py or a
+# st.cache_resource: the script module is re-executed on every rerun and the resource cache
+# is cleared by new sessions, while an imported module persists for the whole process.
+_UPDATE_LOCK = threading.Lock()
+_UPDATE_EXECUTOR = None
+_UPDATE_FUTURE = None
+
+def submit_background_update():
+    """Start update_all() on the single background worker, or return the run already in flight.
+
+    Every session calling this while an update is running gets the same future, so two
+    updates never write the output files at the same time.
+    """
+    global _UPDATE_EXECUTOR, _UPDATE_FUTURE
+    with _UPDATE_LOCK:
+        if _UPDATE_FUTURE is None or _UPDATE_FUTURE.done():
+            if _UPDATE_EXECUTOR is None:
+                _UPDATE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="breadth-update")
+            _UPDATE_FUTURE = _UPDATE_EXECUTOR.submit(update_all)
+        return _UPDATE_FUTURE
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the market breadth data files.")
+    parser.add_argument("--force-refresh", action="store_true",
+                        help="re-fetch NSE constituent lists even if the snapshot is fresh")
+    parser.add_argument("--format", choices=["both", "parquet", "csv"], default="both",
+                        help="per-group output files to write (default: both)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only append the days after each group's stored history")
+    args = parser.parse_args()
+    if not update_all(force_refresh=args.force_refresh, output_format=args.format, incremental=args.incremental):
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
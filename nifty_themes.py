@@ -1,4 +1,6 @@
 
+import re
+
 # 43 Custom Themes Configuration
 
 THEMES = {
@@ -373,3 +375,13 @@ THEMES = {
     ]
 }
 
+
+# Breadth CSV filename for each theme, computed once at import
+# e.g. "Power T&D" -> "breadth_theme_power_tandd.csv"
+_SANITIZE_TABLE = str.maketrans({" ": "_", "-": "_", "(": None, ")": None, "&": "and"})
+_DUP_UNDERSCORES = re.compile(r"_+")
+
+def _sanitize(theme_name):
+    return _DUP_UNDERSCORES.sub("_", theme_name.lower().translate(_SANITIZE_TABLE))
+
+THEME_FILES = {name: f"breadth_theme_{_sanitize(name)}.csv" for name in THEMES}
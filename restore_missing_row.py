@@ -1,6 +1,7 @@
 
 import pandas as pd
 import os
+import bisect
 import zipfile
 import glob
 
@@ -9,6 +10,67 @@ BACKUP_ZIP = "/Users/sumeetdas/Desktop/Nifty_Streamlit_bkp_01022026.zip"
 CURRENT_DIR = "/Users/sumeetdas/Projects/nifty-breadth"
 TEMP_DIR = os.path.join(CURRENT_DIR, "temp_restore")
 
+def restore_row_in_file(current_file, backup_file, missing_date):
+    """Splice the backup's missing_date row into current_file.
+
+    Both files normally lead with an ISO Date column, so the row is found and inserted by
+    plain line/string comparison; anything else goes through the pandas merge.
+    Returns "restored", "exists" or "missing" (no such row in the backup).
+    """
+    with open(backup_file) as f:
+        back_header = f.readline()
+        row = next((line for line in f if line.startswith(missing_date + ",")), None)
+    with open(current_file) as f:
+        lines = f.readlines()
+    
+    if not lines or lines[0] != back_header or not back_header.startswith("Date,"):
+        return merge_row_with_pandas(current_file, backup_file, missing_date)
+    if row is None:
+        return "missing"
+    
+    dates = [line.split(",", 1)[0] for line in lines[1:]]
+    if missing_date in dates:
+        return "exists"
+    if dates != sorted(dates):
+        return merge_row_with_pandas(current_file, backup_file, missing_date)
+    
+    if not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    if not row.endswith("\n"):
+        row += "\n"
+    lines.insert(1 + bisect.bisect(dates, missing_date), row)
+    with open(current_file, "w") as f:
+        f.writelines(lines)
+    return "restored"
+
+def merge_row_with_pandas(current_file, backup_file, missing_date):
+    """Fallback for files without a leading ISO Date column: concat, sort and rewrite."""
+    df_curr = pd.read_csv(current_file)
+    df_back = pd.read_csv(backup_file)
+    
+    # Check if missing date exists in Backup
+    if 'Date' not in df_back.columns:
+        return "missing"
+    
+    row_to_restore = df_back[df_back['Date'] == missing_date]
+    
+    if row_to_restore.empty:
+        return "missing"
+        
+    # Check if it already exists in Current (to avoid dupe)
+    if not df_curr.empty and 'Date' in df_curr.columns:
+        if missing_date in df_curr['Date'].values:
+            return "exists"
+    
+    # Merge and Sort
+    df_merged = pd.concat([df_curr, row_to_restore], ignore_index=True)
+    df_merged['Date'] = pd.to_datetime(df_merged['Date'])
+    df_merged = df_merged.sort_values('Date').drop_duplicates(subset=['Date'], keep='last')
+    
+    # Save
+    df_merged.to_csv(current_file, index=False)
+    return "restored"
+
 def restore_missing_date(missing_date="2026-02-01"):
     print(f"--- Restoring Missing Data for {missing_date} ---")
     
@@ -35,35 +97,13 @@ def restore_missing_date(missing_date="2026-02-01"):
             print(f"Skipping {filename}: Not found in backup.")
             continue
             
-        # Load Dataframes
         try:
-            df_curr = pd.read_csv(current_file)
-            df_back = pd.read_csv(backup_file)
-            
-            # Check if missing date exists in Backup
-            if 'Date' not in df_back.columns: continue
-            
-            row_to_restore = df_back[df_back['Date'] == missing_date]
-            
-            if row_to_restore.empty:
-                # print(f"Info: {filename} had no data for {missing_date} in backup.")
-                continue
-                
-            # Check if it already exists in Current (to avoid dupe)
-            if not df_curr.empty and 'Date' in df_curr.columns:
-                if missing_date in df_curr['Date'].values:
-                    print(f"Skipping {filename}: {missing_date} already exists.")
-                    continue
-            
-            # Merge and Sort
-            print(f"Restoring row for {filename}...")
-            df_merged = pd.concat([df_curr, row_to_restore], ignore_index=True)
-            df_merged['Date'] = pd.to_datetime(df_merged['Date'])
-            df_merged = df_merged.sort_values('Date').drop_duplicates(subset=['Date'], keep='last')
-            
-            # Save
-            df_merged.to_csv(current_file, index=False)
-            restored_count += 1
+            result = restore_row_in_file(current_file, backup_file, missing_date)
+            if result == "exists":
+                print(f"Skipping {filename}: {missing_date} already exists.")
+            elif result == "restored":
+                print(f"Restored row for {filename}.")
+                restored_count += 1
             
         except Exception as e:
             print(f"Error processing {filename}: {e}")
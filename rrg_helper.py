@@ -2,15 +2,109 @@
 import pandas as pd
 import numpy as np
 
+try:
+    import numexpr as ne # Optional: fuses the 100 * (a / b) ratio arithmetic into one threaded pass
+except ImportError:
+    ne = None
+
+try:
+    import bottleneck as bn # Optional: C moving-window means, several times faster than pandas rolling
+except ImportError:
+    bn = None
+
+try:
+    from numba import njit # Optional: compiles the fused RS-Ratio/RS-Momentum kernel
+    USE_NUMBA = True
+except ImportError:
+    USE_NUMBA = False
+    def njit(*args, **kwargs):
+        return args[0] if args and callable(args[0]) else (lambda func: func)
+
+@njit(cache=True)
+def _window_add(total, comp, count, run_value, run_length, x):
+    """Add x to a rolling-mean window (Kahan-compensated, tracking the run of equal values)."""
+    if x == x:
+        count += 1
+        y = x - comp
+        t = total + y
+        comp = t - total - y
+        total = t
+        if x == run_value:
+            run_length += 1
+        else:
+            run_value = x
+            run_length = 1
+    return total, comp, count, run_value, run_length
+
+@njit(cache=True)
+def _window_remove(total, comp, count, x):
+    """Drop x from a rolling-mean window (with its own compensation term, as pandas does)."""
+    if x == x:
+        count -= 1
+        y = -x - comp
+        t = total + y
+        comp = t - total - y
+        total = t
+    return total, comp, count
+
+@njit(cache=True)
+def _window_mean(total, count, run_value, run_length, min_periods):
+    if count >= min_periods and count > 0:
+        return run_value if run_length >= count else total / count
+    return np.nan
+
+@njit(cache=True, nogil=True)
+def rs_ratio_momentum(rs, offsets, window_ratio, window_mom):
+    """RS-Ratio and RS-Momentum for back-to-back asset series in one pass.
+
+    rs holds each asset's RS values contiguously, asset a spanning offsets[a]:offsets[a + 1].
+    Both rolling means (window_ratio over RS, window_mom over the ratio) advance together,
+    matching pandas' rolling(window).mean() on each asset's own series. Serial on purpose:
+    dashboard sessions call it from several threads, which numba's workqueue threading layer
+    cannot handle for parallel kernels (and the arrays are only ~100k points).
+    """
+    rs_ratio = np.empty(len(rs))
+    rs_momentum = np.empty(len(rs))
+    for a in range(len(offsets) - 1):
+        start, end = offsets[a], offsets[a + 1]
+        sum_rs, add_rs, del_rs, n_rs, run_rs, len_rs = 0.0, 0.0, 0.0, 0, np.nan, 0
+        sum_rt, add_rt, del_rt, n_rt, run_rt, len_rt = 0.0, 0.0, 0.0, 0, np.nan, 0
+        for i in range(start, end):
+            if i - window_ratio >= start:
+                sum_rs, del_rs, n_rs = _window_remove(sum_rs, del_rs, n_rs, rs[i - window_ratio])
+            sum_rs, add_rs, n_rs, run_rs, len_rs = _window_add(sum_rs, add_rs, n_rs, run_rs, len_rs, rs[i])
+            rs_ratio[i] = 100 * (rs[i] / _window_mean(sum_rs, n_rs, run_rs, len_rs, window_ratio))
+            
+            if i - window_mom >= start:
+                sum_rt, del_rt, n_rt = _window_remove(sum_rt, del_rt, n_rt, rs_ratio[i - window_mom])
+            sum_rt, add_rt, n_rt, run_rt, len_rt = _window_add(sum_rt, add_rt, n_rt, run_rt, len_rt, rs_ratio[i])
+            rs_momentum[i] = 100 * (rs_ratio[i] / _window_mean(sum_rt, n_rt, run_rt, len_rt, window_mom))
+    return rs_ratio, rs_momentum
+
+def scaled_ratio(numerator, denominator):
+    """100 * (numerator / denominator), elementwise."""
+    if ne is not None:
+        return ne.evaluate("100 * (a / b)", local_dict={'a': numerator, 'b': denominator})
+    return 100 * (numerator / denominator)
+
 class RRGCalculator:
     def __init__(self, benchmark_df):
         """
         Initialize with Benchmark Data (Nifty 50).
-        benchmark_df should obtain 'Date' and 'Index_Close'.
+        benchmark_df should obtain 'Date' and 'Index_Close' (or be indexed by Date already).
         """
-        self.benchmark = benchmark_df.copy()
-        self.benchmark['Date'] = pd.to_datetime(self.benchmark['Date'])
-        self.benchmark = self.benchmark.set_index('Date').sort_index()
+        if 'Date' not in benchmark_df.columns and isinstance(benchmark_df.index, pd.DatetimeIndex):
+            # Already Date-indexed
+            self.benchmark = benchmark_df
+        else:
+            # set_index returns a new frame, so the caller's (cached) frame is never modified
+            if not pd.api.types.is_datetime64_any_dtype(benchmark_df['Date']):
+                benchmark_df = benchmark_df.assign(Date=pd.to_datetime(benchmark_df['Date']))
+            self.benchmark = benchmark_df.set_index('Date')
+        if not self.benchmark.index.is_monotonic_increasing:
+            self.benchmark = self.benchmark.sort_index()
+        # Resampled benchmark closes per timeframe (the dashboard keeps one calculator across reruns)
+        self._bench_close = {}
         
     def _resample(self, df, timeframe):
         """Resample data to D (Daily), W (Weekly-Fri), M (Monthly)."""
@@ -33,71 +127,92 @@ class RRGCalculator:
                           ['Date', 'Ticker', 'RS_Ratio', 'RS_Momentum']
                           Filtered to include the last 'tail_length' periods for each asset.
         """
-        results = []
-        
-        # Resample Benchmark
-        bench_resampled = self._resample(self.benchmark, timeframe)
-        bench_close = bench_resampled['Index_Close']
+        # Resample Benchmark (once per timeframe for this calculator)
+        bench_close = self._bench_close.get(timeframe)
+        if bench_close is None:
+            bench_close = self._resample(self.benchmark, timeframe)['Index_Close']
+            self._bench_close[timeframe] = bench_close
         
+        # Prepare Asset Data: one wide close matrix, a column per asset
+        closes = {}
         for name, df in df_dict.items():
             if df.empty:
                 continue
-                
-            # Prepare Asset Data
-            df = df.copy()
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df.set_index('Date').sort_index()
-            asset_resampled = self._resample(df, timeframe)
-            
-            # Align Asset and Benchmark (Intersection of dates)
-            # Use inner join to ensure we only calc where both have data
-            combined = pd.concat([asset_resampled['Index_Close'], bench_close], axis=1, join='inner')
-            combined.columns = ['Asset', 'Benchmark']
-            
-            if combined.empty:
-                continue
-                
-            # 1. Calculate Relative Strength (RS)
-            # RS = 100 * (Asset / Benchmark)
-            combined['RS'] = 100 * (combined['Asset'] / combined['Benchmark'])
-            
-            # 2. RS-Ratio (Trend)
-            # JdK RRG often uses Moving Average for normalization. 
-            # We'll use a standard proxy: Ratio = 100 * (RS / MA(RS))
-            # Parameters: Daily=50, Weekly=12? Let's use adaptive or fixed.
-            # Fixed 14 period is good for "Rotation".
-            # User mentioned "period should be adjustable", but that usually means resample period.
-            # I'll stick to a standard lookback for smoothing.
-            # Standard RRG uses ~10-14 period smoothing.
-            window_ratio = 14
-            combined['RS_MA'] = combined['RS'].rolling(window=window_ratio).mean()
-            combined['RS_Ratio'] = 100 * (combined['RS'] / combined['RS_MA'])
-            
-            # 3. RS-Momentum (ROC of Ratio)
-            # Momentum = 100 * (RS_Ratio / MA(RS_Ratio))
-            # Or simplified: Momentum is just the Rate of Change? 
-            # The standard JdK formula is complex (uses normalized MACD logic).
-            # We will use the simplified normalized momentum:
-            window_mom = 9 # slightly faster than ratio
-            combined['Ratio_MA'] = combined['RS_Ratio'].rolling(window=window_mom).mean()
-            combined['RS_Momentum'] = 100 * (combined['RS_Ratio'] / combined['Ratio_MA'])
-            
-            # Filter NaNs
-            combined = combined.dropna()
-            
-            # Select only last N records for the "Tail"
-            # User wants 1-12 periods tail.
-            # We fetch slightly more to draw lines, but user configures display length.
-            # Here we return "enough" history, UI filters the exact tail.
-            # Let's return the last 20 periods to be safe for a max 12 tail.
-            tail_data = combined.iloc[-30:] # Fetch last 30 points
-            
-            for date, row in tail_data.iterrows():
-                results.append({
-                    'Date': date,
-                    'Ticker': name,
-                    'RS_Ratio': row['RS_Ratio'],
-                    'RS_Momentum': row['RS_Momentum']
-                })
-                
-        return pd.DataFrame(results)
+            # The dashboard hands over typed, date-sorted frames: parse/sort only when needed
+            dates = df['Date']
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates)
+            close = pd.Series(df['Index_Close'].to_numpy(), index=pd.DatetimeIndex(dates, name='Date'))
+            if not close.index.is_monotonic_increasing:
+                close = close.sort_index()
+            closes[name] = close
+        if not closes:
+            return pd.DataFrame()
+        wide = pd.concat(closes, axis=1)
+        if timeframe != 'D':
+            # Per column this is the same 'last' resample as _resample; empty periods stay NaN
+            wide = wide.resample('W-FRI' if timeframe == 'W' else 'ME').last()
+        
+        # Align Asset and Benchmark (Intersection of dates)
+        # Each asset only keeps the benchmark dates it has a close on
+        wide = wide.reindex(bench_close.index)
+        
+        # 1. Calculate Relative Strength (RS)
+        # RS = 100 * (Asset / Benchmark)
+        rs_wide = wide.div(bench_close, axis=0) * 100
+        
+        # Flatten to one series per asset, back to back (asset-major, dates ascending), so the
+        # rolling windows below run over each asset's own dates only
+        rs_matrix = rs_wide.to_numpy().T
+        present = ~np.isnan(rs_matrix)
+        rs = rs_matrix[present]
+        counts = present.sum(axis=1)
+        asset_codes = np.repeat(np.arange(len(closes)), counts)
+        dates = np.broadcast_to(rs_wide.index.to_numpy(), rs_matrix.shape)[present]
+        
+        # 2. RS-Ratio (Trend)
+        # JdK RRG often uses Moving Average for normalization. 
+        # We'll use a standard proxy: Ratio = 100 * (RS / MA(RS))
+        # Standard RRG uses ~10-14 period smoothing; fixed 14 period is good for "Rotation".
+        window_ratio = 14
+        # 3. RS-Momentum (ROC of Ratio)
+        # Momentum = 100 * (RS_Ratio / MA(RS_Ratio))
+        # The standard JdK formula is complex (uses normalized MACD logic).
+        # We will use the simplified normalized momentum:
+        window_mom = 9 # slightly faster than ratio
+        if USE_NUMBA:
+            offsets = np.concatenate(([0], np.cumsum(counts)))
+            # float64 like pandas' rolling, whatever the closes' dtype (the dashboard loads float32)
+            rs_ratio, rs_momentum = rs_ratio_momentum(rs.astype(np.float64), offsets, window_ratio, window_mom)
+        else:
+            if bn is not None:
+                # One move_mean over all assets back to back; the first window - 1 points of each
+                # asset would average in the previous asset's tail, so they are blanked out
+                position = np.arange(len(rs)) - np.repeat(np.cumsum(counts) - counts, counts)
+                def rolling_mean(values, window):
+                    means = bn.move_mean(values.astype(np.float64), window=window, min_count=window)
+                    means[position < window - 1] = np.nan
+                    return means
+            else:
+                def rolling_mean(values, window):
+                    return pd.Series(values).groupby(asset_codes, sort=False).rolling(window=window).mean().to_numpy()
+            rs_ratio = scaled_ratio(rs, rolling_mean(rs, window_ratio))
+            rs_momentum = scaled_ratio(rs_ratio, rolling_mean(rs_ratio, window_mom))
+        
+        # Filter NaNs
+        valid = ~np.isnan(rs_momentum)
+        
+        # Select only last N records for the "Tail"
+        # We return "enough" history (last 30 points per asset), UI filters the exact tail.
+        keep = np.flatnonzero(valid)
+        kept_codes = asset_codes[keep]
+        keep = keep[pd.Series(kept_codes).groupby(kept_codes, sort=False).cumcount(ascending=False).to_numpy() < 30]
+        if len(keep) == 0:
+            return pd.DataFrame()
+        
+        return pd.DataFrame({
+            'Date': dates[keep],
+            'Ticker': np.array(list(closes), dtype=object)[asset_codes[keep]],
+            'RS_Ratio': rs_ratio[keep],
+            'RS_Momentum': rs_momentum[keep]
+        })
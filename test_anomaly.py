@@ -17,36 +17,30 @@ warnings.filterwarnings('ignore')
 
 recent_df = df.tail(15) 
 pct_returns = recent_df.pct_change()
-split_anomalies = []
-
-for col in pct_returns.columns:
-    # Check if any single daily drop is worse than -60% (classic stock split / demerger signature)
-    if (pct_returns[col] < -0.60).any():
-        split_anomalies.append(col)
+# Check if any single daily drop is worse than -60% (classic stock split / demerger signature)
+split_anomalies = pct_returns.columns[(pct_returns < -0.60).any()].tolist()
 
 if split_anomalies:
     print(f"Self-Healing Triggered: Detected massive corporate action anomalies for {split_anomalies}")
-    for ticker in split_anomalies:
-        try:
-            print(f"Fetching adjusted history for {ticker} from Yahoo Finance fallback...")
-            # Fetch 5 years to be safe for all timeframe calculations (1D to 5Y)
-            yf_data = yf.download(ticker, start=df.index[0], end=df.index[-1] + pd.Timedelta(days=1), progress=False, auto_adjust=True)
-            if not yf_data.empty:
-                if 'Close' in yf_data.columns.get_level_values(0):
-                    clean_series = yf_data['Close'].iloc[:, 0]
-                elif 'Close' in yf_data.columns:
-                    clean_series = yf_data['Close']
-                else:
-                    continue
-                    
-                # Standardize index
-                clean_series.index = clean_series.index.tz_localize(None)
+    try:
+        print(f"Fetching adjusted history for {split_anomalies} from Yahoo Finance fallback...")
+        # One batched request; fetch 5 years to be safe for all timeframe calculations (1D to 5Y)
+        yf_data = yf.download(split_anomalies, start=df.index[0], end=df.index[-1] + pd.Timedelta(days=1), progress=False, auto_adjust=True, group_by='ticker')
+        if not yf_data.empty:
+            if isinstance(yf_data.columns, pd.MultiIndex):
+                # Every ticker's Close in one vectorized selection
+                close_panel = yf_data.xs('Close', axis=1, level=1)
+            else:
+                close_panel = yf_data[['Close']].set_axis(split_anomalies, axis=1)
                 
-                # Update our pivot_df
-                # df.update will overwrite only the non-NaN values where the indices match
-                df[ticker].update(clean_series)
-        except Exception as e:
-            print(f"Failed to substitute {ticker}: {e}")
+            # Standardize index
+            close_panel.index = close_panel.index.tz_localize(None)
+            
+            # Update our pivot_df
+            # df.update will overwrite only the non-NaN values where the indices match
+            df.update(close_panel)
+    except Exception as e:
+        print(f"Failed to substitute {split_anomalies}: {e}")
 
 print("\nAfter:")
 print(df.tail(10))
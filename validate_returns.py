@@ -1,7 +1,53 @@
 
 import pandas as pd
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 import glob
+import os
+import pyarrow.parquet as pq
+
+# The only columns the return check looks at
+PRICE_COLUMNS = ('Date', 'Index_Close')
+
+def read_prices(f):
+    """Date (datetime) and Index_Close of a breadth CSV, from its Parquet twin when that is current."""
+    parquet_path = os.path.splitext(f)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(f):
+        names = pq.read_schema(parquet_path).names
+        return pd.read_parquet(parquet_path, columns=[c for c in PRICE_COLUMNS if c in names], engine='pyarrow')
+    df = pd.read_csv(f, usecols=lambda c: c in PRICE_COLUMNS)
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+def check_file(f):
+    """1-year return check for one breadth CSV; returns the filename if it fails, else None."""
+    try:
+        df = read_prices(f)
+        
+        if 'Index_Close' not in df.columns:
+            print(f"MISSING COL: {f}")
+            return None
+            
+        latest = df.iloc[-1]
+        current_date = latest['Date']
+        current_price = latest['Index_Close']
+        
+        target_date = current_date - timedelta(days=365)
+        # Dates are written in order: binary-search the last row on or before target_date
+        pos = df['Date'].searchsorted(target_date, side='right') - 1
+        
+        if pos >= 0:
+            past_price = df['Index_Close'].iat[pos]
+            ret = ((current_price - past_price) / past_price) * 100
+            # print(f"{f}: {ret:.2f}%")
+        else:
+            print(f"NO DATA FOR PERIOD: {f} (Start Date: {df['Date'].min()})")
+            return f
+            
+    except Exception as e:
+        print(f"ERROR: {f} -> {e}")
+        return f
+    return None
 
 def check_returns():
     periods = {
@@ -11,36 +57,9 @@ def check_returns():
     csv_files = glob.glob("breadth_theme_*.csv")
     print(f"Checking returns for {len(csv_files)} files...")
     
-    failed = []
-    
-    for f in csv_files:
-        try:
-            df = pd.read_csv(f)
-            df['Date'] = pd.to_datetime(df['Date'])
-            
-            if 'Index_Close' not in df.columns:
-                print(f"MISSING COL: {f}")
-                continue
-                
-            latest = df.iloc[-1]
-            current_date = latest['Date']
-            current_price = latest['Index_Close']
-            
-            target_date = current_date - timedelta(days=365)
-            mask = df['Date'] <= target_date
-            
-            if mask.any():
-                past_row = df[mask].iloc[-1]
-                past_price = past_row['Index_Close']
-                ret = ((current_price - past_price) / past_price) * 100
-                # print(f"{f}: {ret:.2f}%")
-            else:
-                print(f"NO DATA FOR PERIOD: {f} (Start Date: {df['Date'].min()})")
-                failed.append(f)
-                
-        except Exception as e:
-            print(f"ERROR: {f} -> {e}")
-            failed.append(f)
+    # Overlap the CSV reads (pandas releases the GIL while parsing); map keeps file order
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        failed = [f for f in executor.map(check_file, csv_files) if f]
             
     if not failed:
         print("\nAll themes have valid 1-Year return data.")